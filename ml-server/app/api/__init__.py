@@ -1,5 +1,6 @@
+from .admin_routes import router as admin_router
 from .ai_routes import router as ai_router
 from .calendar_routes import router as calendar_router
 from .health_routes import router as health_router
 
-__all__ = ["ai_router", "calendar_router", "health_router"]
\ No newline at end of file
+__all__ = ["admin_router", "ai_router", "calendar_router", "health_router"]
\ No newline at end of file
@@ -0,0 +1,64 @@
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import hmac
+import logging
+from app.utils.config import get_settings
+from app.utils.profiling import ProfileStore
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+settings = get_settings()
+
+# Profiles captured by ProfilingMiddleware
+profile_store = ProfileStore(settings.profiling_max_profiles)
+
+def _require_admin(token: Optional[str]):
+    # Without a configured token the admin endpoints are only available in debug mode
+    if settings.admin_token:
+        if token is None or not hmac.compare_digest(token, settings.admin_token):
+            raise HTTPException(status_code=401, detail="Invalid admin token")
+    elif not settings.debug:
+        raise HTTPException(status_code=404, detail="Not found")
+
+@router.get("/profiles")
+async def list_profiles(x_admin_token: Optional[str] = Header(None)):
+    """
+    List captured request profiles, newest first
+    """
+    _require_admin(x_admin_token)
+    return {"profiles": profile_store.list()}
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """
+    Get the stage spans of a captured request profile
+    """
+    _require_admin(x_admin_token)
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile.to_dict()
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+async def get_profile_folded_stacks(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """
+    Get CPU samples in collapsed-stack format for flame-graph rendering
+    """
+    _require_admin(x_admin_token)
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if not profile.cpu_samples:
+        raise HTTPException(status_code=404, detail="Profile has no CPU samples")
+    return profile.folded_stacks()
+
+@router.delete("/profiles")
+async def clear_profiles(x_admin_token: Optional[str] = Header(None)):
+    """
+    Drop all captured profiles
+    """
+    _require_admin(x_admin_token)
+    profile_store.clear()
+    return {"cleared": True}
\ No newline at end of file
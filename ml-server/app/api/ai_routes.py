@@ -1,5 +1,8 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from typing import List, Optional
+import json
 import logging
 from app.models.schemas import (
     NaturalLanguageRequest, 
@@ -7,6 +10,8 @@ from app.models.schemas import (
     EventSuggestion
 )
 from app.services.openai_service import OpenAIService
+from app.services.llm_backends import OutputTruncated
+from app.services.admission import AdmissionController, AdmissionRejected, Priority
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -14,13 +19,24 @@ router = APIRouter()
 # Initialize OpenAI service
 openai_service = OpenAIService()
 
+# Per-user rate limiting and fair queueing in front of the LLM calls
+admission = AdmissionController()
+
+def _too_many_requests(rejection: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=f"Too many AI requests: {rejection.reason}",
+        headers={"Retry-After": str(rejection.retry_after)}
+    )
+
 @router.post("/parse-event", response_model=AIResponse)
 async def parse_natural_language_event(request: NaturalLanguageRequest):
     """
     Parse natural language input into structured event data
     """
     try:
-        suggestions = await openai_service.parse_natural_language_event(request)
+        async with admission.slot(request.user_id, Priority.INTERACTIVE):
+            suggestions, partial = await openai_service.parse_natural_language_event(request)
         
         if not suggestions:
             return AIResponse(
@@ -30,19 +46,67 @@ async def parse_natural_language_event(request: NaturalLanguageRequest):
                 suggestions=None
             )
         
+        if partial:
+            # The stream failed partway; more events may have been in the input
+            return AIResponse(
+                success=True,
+                message=f"Parsed {len(suggestions)} event(s) before parsing was interrupted",
+                data={"event_count": len(suggestions), "partial": True},
+                suggestions=suggestions
+            )
+        
         return AIResponse(
             success=True,
             message=f"Successfully parsed {len(suggestions)} event(s)",
-            data={"event_count": len(suggestions)},
+            data={"event_count": len(suggestions), "partial": False},
             suggestions=suggestions
         )
         
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
     except Exception as e:
         logger.error(f"Error parsing natural language event: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/parse-event/stream")
+async def stream_natural_language_event(request: NaturalLanguageRequest):
+    """
+    Parse natural language input, streaming each event as NDJSON as soon as it is decoded
+    """
+    try:
+        ticket = await admission.acquire(request.user_id, Priority.INTERACTIVE)
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
+    
+    async def stream():
+        count = 0
+        try:
+            async for suggestion in openai_service.stream_natural_language_event(request):
+                count += 1
+                yield json.dumps({"type": "event", "event": suggestion.model_dump(mode="json")}) + "\n"
+        except OutputTruncated as e:
+            logger.warning(f"Streamed events may be incomplete: {e}")
+            yield json.dumps({"type": "error", "message": "Model output was cut off at the token limit"}) + "\n"
+        except Exception as e:
+            logger.error(f"Error streaming natural language event: {e}")
+            yield json.dumps({"type": "error", "message": "Event parsing was interrupted"}) + "\n"
+        finally:
+            ticket.release()
+        yield json.dumps({"type": "done", "event_count": count}) + "\n"
+    
+    # The background task covers streams that are abandoned before they start
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(ticket.release)
+    )
+
 @router.post("/optimize-schedule")
-async def get_schedule_optimization(events: List[dict], preferences: dict = None):
+async def get_schedule_optimization(
+    events: List[dict],
+    preferences: dict = None,
+    x_user_id: Optional[str] = Header(None)
+):
     """
     Get AI-powered schedule optimization suggestions
     """
@@ -50,7 +114,8 @@ async def get_schedule_optimization(events: List[dict], preferences: dict = None
         if preferences is None:
             preferences = {}
             
-        optimization_result = await openai_service.suggest_schedule_optimization(events, preferences)
+        async with admission.slot(x_user_id, Priority.BATCH):
+            optimization_result = await openai_service.suggest_schedule_optimization(events, preferences)
         
         return AIResponse(
             success=True,
@@ -59,17 +124,20 @@ async def get_schedule_optimization(events: List[dict], preferences: dict = None
             suggestions=None
         )
         
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
     except Exception as e:
         logger.error(f"Error optimizing schedule: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.post("/generate-summary")
-async def generate_meeting_summary(meeting_details: dict):
+async def generate_meeting_summary(meeting_details: dict, x_user_id: Optional[str] = Header(None)):
     """
     Generate AI-powered meeting summary
     """
     try:
-        summary = await openai_service.generate_meeting_summary(meeting_details)
+        async with admission.slot(x_user_id, Priority.BATCH):
+            summary = await openai_service.generate_meeting_summary(meeting_details)
         
         return AIResponse(
             success=True,
@@ -78,6 +146,8 @@ async def generate_meeting_summary(meeting_details: dict):
             suggestions=None
         )
         
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
     except Exception as e:
         logger.error(f"Error generating meeting summary: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -90,5 +160,8 @@ async def test_ai_service():
     return {
         "message": "AI service is running",
         "openai_configured": bool(openai_service.settings.openai_api_key),
-        "model": openai_service.settings.openai_model
+        "model": openai_service.settings.openai_model,
+        "local_model": openai_service.settings.llm_local_model if openai_service.settings.llm_local_enabled else None,
+        "semantic_cache": openai_service.semantic_cache.stats() if openai_service.semantic_cache else None,
+        "admission": admission.stats()
     }
\ No newline at end of file
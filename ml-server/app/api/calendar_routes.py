@@ -1,9 +1,12 @@
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from datetime import datetime
 from typing import Optional
+import json
 import logging
-from app.models.schemas import ScheduleOptimizationRequest, AIResponse
+from app.models.schemas import ScheduleOptimizationRequest, AIResponse, SummaryRecomputeRequest, BulkConflictRequest
 from app.services.calendar_service import CalendarService
+from app.utils.profiling import span
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -41,7 +44,8 @@ async def detect_schedule_conflicts(
     """
     try:
         events = await calendar_service.get_user_events(user_id, start_date, end_date)
-        conflicts = await calendar_service.detect_conflicts(events)
+        with span("analyze"):
+            conflicts = await calendar_service.detect_conflicts(events)
         
         return {
             "user_id": user_id,
@@ -54,6 +58,29 @@ async def detect_schedule_conflicts(
         logger.error(f"Error detecting schedule conflicts: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/conflicts/bulk")
+async def detect_bulk_schedule_conflicts(request: BulkConflictRequest):
+    """
+    Detect conflicts for many users at once, streamed as NDJSON as each user completes
+    """
+    user_ids = list(dict.fromkeys(request.user_ids))
+    if len(user_ids) > calendar_service.settings.bulk_conflict_max_users:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {calendar_service.settings.bulk_conflict_max_users} users per request"
+        )
+    
+    async def stream():
+        try:
+            async for result in calendar_service.scan_conflicts_bulk(user_ids, request.start_date, request.end_date):
+                yield json.dumps(result, default=str) + "\n"
+        except Exception as e:
+            # Headers are already sent, so end the stream with an error line instead of cutting it off
+            logger.error(f"Error streaming bulk conflict scan: {e}")
+            yield json.dumps({"type": "error", "message": "Bulk conflict scan was interrupted"}) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @router.get("/suggest-times/{user_id}")
 async def suggest_meeting_times(
     user_id: str,
@@ -79,6 +106,48 @@ async def suggest_meeting_times(
         logger.error(f"Error suggesting meeting times: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.get("/summary/{user_id}")
+async def get_schedule_summary(
+    user_id: str,
+    start_date: datetime = Query(...),
+    end_date: datetime = Query(...)
+):
+    """
+    Get precomputed per-day schedule summaries composed over a date range
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    
+    try:
+        result = await calendar_service.get_schedule_summary(user_id, start_date, end_date)
+        
+        return {
+            "user_id": user_id,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            **result
+        }
+        
+    except Exception as e:
+        logger.error(f"Error building schedule summary: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/summary/{user_id}/recompute")
+async def recompute_schedule_summary(user_id: str, request: SummaryRecomputeRequest):
+    """
+    Recompute summary cells for days whose events changed
+    """
+    try:
+        result = await calendar_service.recompute_schedule_summary(
+            user_id, request.dates, request.utc_offset_minutes
+        )
+        
+        return {"user_id": user_id, **result}
+        
+    except Exception as e:
+        logger.error(f"Error recomputing schedule summary: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @router.get("/events/{user_id}")
 async def get_user_events(
     user_id: str,
@@ -1,40 +1,56 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from datetime import datetime
 from app.models.schemas import HealthCheckResponse
-import httpx
+from app.services.health_monitor import HealthMonitor
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Background dependency prober, started and stopped with the application
+health_monitor = HealthMonitor()
+
 @router.get("/", response_model=HealthCheckResponse)
 async def health_check():
     """
-    Health check endpoint
-    """
-    dependencies = {}
-    
-    # Check OpenAI API availability
-    try:
-        import openai
-        dependencies["openai"] = "available"
-    except Exception:
-        dependencies["openai"] = "unavailable"
-    
-    # Check backend API availability
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get("http://localhost:8080/actuator/health", timeout=5.0)
-            if response.status_code == 200:
-                dependencies["backend_api"] = "available"
-            else:
-                dependencies["backend_api"] = "degraded"
-    except Exception:
-        dependencies["backend_api"] = "unavailable"
-    
+    Health check endpoint (served from the last background probe)
+    """
     return HealthCheckResponse(
-        status="healthy",
+        status="healthy" if health_monitor.is_ready() else "degraded",
         timestamp=datetime.now(),
         version="1.0.0",
-        dependencies=dependencies
-    )
\ No newline at end of file
+        dependencies=health_monitor.dependency_statuses()
+    )
+
+@router.get("/live")
+async def liveness_check():
+    """
+    Liveness probe: the process is up and serving requests
+    """
+    return {"status": "alive", "timestamp": datetime.now().isoformat()}
+
+@router.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: required dependencies were available on the last probe
+    """
+    ready = health_monitor.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "timestamp": datetime.now().isoformat(),
+            "dependencies": health_monitor.dependency_statuses()
+        }
+    )
+
+@router.get("/dependencies")
+async def dependency_details():
+    """
+    Per-dependency status and probe latency statistics
+    """
+    return {
+        "interval_seconds": health_monitor.interval,
+        "dependencies": health_monitor.dependency_details()
+    }
\ No newline at end of file
@@ -1,8 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from app.api import ai_router, calendar_router, health_router
+from app.api import admin_router, ai_router, calendar_router, health_router
+from app.api.admin_routes import profile_store
+from app.api.health_routes import health_monitor
+from app.api.calendar_routes import calendar_service
+from app.api.ai_routes import openai_service
 from app.utils.config import get_settings
+from app.utils.profiling import ProfilingMiddleware
 import logging
 
 # Configure logging
@@ -30,10 +35,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiling (sampled, or forced with the debug header)
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware, settings=settings, store=profile_store)
+
 # Include routers
 app.include_router(health_router, prefix="/health", tags=["health"])
 app.include_router(ai_router, prefix="/ai", tags=["ai"])
 app.include_router(calendar_router, prefix="/calendar", tags=["calendar"])
+app.include_router(admin_router, prefix="/admin", tags=["admin"])
+
+@app.on_event("startup")
+async def configure_torch_threads():
+    # torch's thread pool is process-wide, so it is sized once here for every local model
+    if not (settings.llm_local_enabled or settings.semantic_cache_enabled):
+        return
+    try:
+        import torch
+    except ImportError:
+        logger.warning("torch is not installed; local models will be unavailable")
+        return
+    torch.set_num_threads(settings.torch_num_threads)
+
+@app.on_event("startup")
+async def start_health_monitor():
+    await health_monitor.start()
+
+@app.on_event("shutdown")
+async def stop_health_monitor():
+    await health_monitor.stop()
+
+@app.on_event("shutdown")
+async def close_calendar_client():
+    await calendar_service.close()
+
+@app.on_event("shutdown")
+async def close_llm_backends():
+    await openai_service.llm_router.close()
 
 @app.get("/")
 async def root():
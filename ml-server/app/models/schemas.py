@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 
 class EventCategory(str, Enum):
@@ -44,6 +44,15 @@ class ScheduleOptimizationRequest(BaseModel):
     end_date: datetime = Field(..., description="End date for optimization")
     preferences: Optional[Dict[str, Any]] = Field(None, description="User preferences")
 
+class SummaryRecomputeRequest(BaseModel):
+    dates: List[date] = Field(..., min_length=1, description="Days whose events changed")
+    utc_offset_minutes: int = Field(0, ge=-14 * 60, le=14 * 60, description="UTC offset the days are calendar days in")
+
+class BulkConflictRequest(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, description="User IDs to scan")
+    start_date: Optional[datetime] = Field(None, description="Start of the scan window")
+    end_date: Optional[datetime] = Field(None, description="End of the scan window")
+
 class ConflictResolution(BaseModel):
     conflicting_events: List[Dict[str, Any]] = Field(..., description="Conflicting events")
     resolution_suggestions: List[str] = Field(..., description="Resolution suggestions")
@@ -0,0 +1,241 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+from app.utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    # Lower value is served first; lanes are strict priority
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+# Fair-queueing key for callers that do not identify a user
+ANONYMOUS_USER = "anonymous"
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def try_take(self, cost: float = 1.0) -> float:
+        """
+        Take ``cost`` tokens; returns 0 on success or the seconds until enough tokens accrue
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+@dataclass(order=True)
+class _Waiter:
+    finish_tag: float
+    sequence: int
+    user_id: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class AdmissionTicket:
+    """
+    A granted execution slot; release() is idempotent
+    """
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(time.monotonic() - self._started)
+
+
+class AdmissionController:
+    """
+    Admission control in front of the LLM calls.
+
+    Each user has a token bucket. Requests that pass it run immediately when a
+    concurrency slot is free, otherwise they wait in their lane's queue; each lane
+    has its own length cap, so a batch backlog cannot fill the queue interactive
+    requests wait in. Lanes are served in strict priority order, and within a lane users are served by
+    weighted fair queueing (start-time fair queueing on per-user finish tags),
+    so one heavy user cannot starve the rest. Rejections carry a Retry-After
+    estimate.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.max_concurrency = self.settings.ai_max_concurrency
+        self.max_queue_length = {
+            Priority.INTERACTIVE: self.settings.ai_max_queue_length,
+            Priority.BATCH: self.settings.ai_max_batch_queue_length
+        }
+        self.queue_timeout = self.settings.ai_queue_timeout_seconds
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lanes: Dict[Priority, List[_Waiter]] = {priority: [] for priority in Priority}
+        self._virtual_time: Dict[Priority, float] = {priority: 0.0 for priority in Priority}
+        self._last_finish: Dict[Priority, Dict[str, float]] = {priority: {} for priority in Priority}
+        self._sequence = itertools.count()
+        self._active = 0
+        self._queued: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self._avg_service_seconds = 1.0
+        self.admitted = 0
+        self.rejected = 0
+
+    def _bucket(self, user_id: str) -> TokenBucket:
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            if len(self._buckets) >= self.settings.ai_max_tracked_users:
+                self._prune_buckets()
+            bucket = TokenBucket(self.settings.ai_user_rate_per_second, self.settings.ai_user_burst)
+            self._buckets[user_id] = bucket
+        return bucket
+
+    def _prune_buckets(self):
+        # Buckets that have refilled completely carry no state worth keeping
+        now = time.monotonic()
+        self._buckets = {
+            user_id: bucket for user_id, bucket in self._buckets.items()
+            if bucket.tokens + (now - bucket.updated) * bucket.rate < bucket.capacity
+        }
+
+    def _queued_total(self) -> int:
+        return sum(self._queued.values())
+
+    def _estimated_wait(self, priority: Priority) -> float:
+        # Only waiters in this lane or a higher-priority one are served first
+        ahead = sum(count for lane, count in self._queued.items() if lane <= priority)
+        return (ahead + 1) * self._avg_service_seconds / self.max_concurrency
+
+    def _reject(self, reason: str, retry_after: float):
+        self.rejected += 1
+        logger.warning(f"AI request rejected: {reason}")
+        raise AdmissionRejected(reason, retry_after)
+
+    async def acquire(self, user_id: Optional[str], priority: Priority = Priority.INTERACTIVE, cost: float = 1.0) -> AdmissionTicket:
+        """
+        Wait for an execution slot. Callers without a user id (e.g. service-to-service
+        calls) skip the per-user token bucket, since a shared key would throttle all of
+        them together, but still go through the concurrency limit and queue.
+        """
+        if user_id is None:
+            user_id = ANONYMOUS_USER
+        else:
+            wait = self._bucket(user_id).try_take(cost)
+            if wait > 0:
+                self._reject(f"rate limit exceeded for user {user_id}", wait)
+
+        if self._active < self.max_concurrency and self._queued_total() == 0:
+            self._active += 1
+            self.admitted += 1
+            return AdmissionTicket(self)
+
+        if self._queued[priority] >= self.max_queue_length[priority]:
+            self._reject(f"{priority.name.lower()} admission queue is full", self._estimated_wait(priority))
+
+        weight = self.settings.ai_user_weights.get(user_id, 1.0)
+        last_finish = self._last_finish[priority]
+        start_tag = max(self._virtual_time[priority], last_finish.get(user_id, 0.0))
+        waiter = _Waiter(
+            finish_tag=start_tag + cost / weight,
+            sequence=next(self._sequence),
+            user_id=user_id,
+            future=asyncio.get_running_loop().create_future()
+        )
+        last_finish[user_id] = waiter.finish_tag
+        heapq.heappush(self._lanes[priority], waiter)
+        self._queued[priority] += 1
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                waiter.future.cancel()
+                self._queued[priority] -= 1
+                self._reject("timed out waiting for an AI slot", self._estimated_wait(priority))
+        except asyncio.CancelledError:
+            # Caller went away; hand the slot on if it was already granted
+            if not waiter.future.done():
+                waiter.future.cancel()
+                self._queued[priority] -= 1
+            elif not waiter.future.cancelled():
+                self._release(0.0)
+            raise
+
+        self.admitted += 1
+        return AdmissionTicket(self)
+
+    def _release(self, service_seconds: float):
+        if service_seconds > 0:
+            self._avg_service_seconds = 0.8 * self._avg_service_seconds + 0.2 * service_seconds
+        self._active -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._active < self.max_concurrency and self._queued_total() > 0:
+            priority, waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self._queued[priority] -= 1
+            self._active += 1
+            waiter.future.set_result(None)
+        for priority, lane in self._lanes.items():
+            if not lane:
+                # An idle lane restarts fair-queueing from scratch
+                self._last_finish[priority].clear()
+
+    def _next_waiter(self) -> Tuple[Optional[Priority], Optional[_Waiter]]:
+        for priority in Priority:
+            lane = self._lanes[priority]
+            while lane:
+                waiter = heapq.heappop(lane)
+                if waiter.future.done():
+                    continue
+                self._virtual_time[priority] = waiter.finish_tag
+                return priority, waiter
+        return None, None
+
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[str], priority: Priority = Priority.INTERACTIVE, cost: float = 1.0):
+        ticket = await self.acquire(user_id, priority, cost)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "queued": self._queued_total(),
+            "max_concurrency": self.max_concurrency,
+            "max_queue_length": {priority.name.lower(): cap for priority, cap in self.max_queue_length.items()},
+            "queued_by_lane": {priority.name.lower(): count for priority, count in self._queued.items()},
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_service_seconds": round(self._avg_service_seconds, 3)
+        }
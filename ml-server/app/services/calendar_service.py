@@ -1,9 +1,20 @@
+import asyncio
 import httpx
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta, timezone
 from app.utils.config import get_settings
 from app.models.schemas import ScheduleOptimizationRequest, ConflictResolution
+from app.utils.profiling import span
+from app.services.schedule_summary import (
+    ScheduleSummaryStore,
+    compose_summaries,
+    compute_day_summary,
+    days_in_range,
+    group_events_by_day,
+    parse_event_time,
+    summary_timezone
+)
 
 logger = logging.getLogger(__name__)
 
@@ -11,75 +22,101 @@ class CalendarService:
     def __init__(self):
         self.settings = get_settings()
         self.backend_url = self.settings.backend_graphql_endpoint
+        self.summary_store = ScheduleSummaryStore()
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Shared connection-pooled client for backend calls
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=30.0,
+                limits=httpx.Limits(
+                    max_connections=self.settings.backend_max_connections,
+                    max_keepalive_connections=self.settings.backend_max_keepalive_connections
+                )
+            )
+        return self._client
+    
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def get_user_events(self, user_id: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """
         Fetch user events from the backend GraphQL API
         """
         try:
-            if start_date and end_date:
-                query = """
-                query GetEventsByDateRange($userId: String!, $startTime: DateTime!, $endTime: DateTime!) {
-                    eventsByDateRange(userId: $userId, startTime: $startTime, endTime: $endTime) {
-                        id
-                        title
-                        description
-                        startTime
-                        endTime
-                        location
-                        category
-                        priority
-                        createdAt
-                        updatedAt
-                    }
-                }
-                """
-                variables = {
-                    "userId": user_id,
-                    "startTime": start_date.isoformat(),
-                    "endTime": end_date.isoformat()
-                }
-            else:
-                query = """
-                query GetEvents($userId: String!) {
-                    events(userId: $userId) {
-                        id
-                        title
-                        description
-                        startTime
-                        endTime
-                        location
-                        category
-                        priority
-                        createdAt
-                        updatedAt
-                    }
-                }
-                """
-                variables = {"userId": user_id}
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.backend_url,
-                    json={"query": query, "variables": variables},
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                if "errors" in data:
-                    logger.error(f"GraphQL errors: {data['errors']}")
-                    return []
-                
-                if start_date and end_date:
-                    return data.get("data", {}).get("eventsByDateRange", [])
-                else:
-                    return data.get("data", {}).get("events", [])
-                    
+            return await self.fetch_user_events(user_id, start_date, end_date)
         except Exception as e:
             logger.error(f"Error fetching user events: {e}")
             return []
     
+    async def fetch_user_events(self, user_id: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch user events from the backend GraphQL API, raising on failure
+        """
+        if start_date and end_date:
+            query = """
+            query GetEventsByDateRange($userId: String!, $startTime: DateTime!, $endTime: DateTime!) {
+                eventsByDateRange(userId: $userId, startTime: $startTime, endTime: $endTime) {
+                    id
+                    title
+                    description
+                    startTime
+                    endTime
+                    location
+                    category
+                    priority
+                    createdAt
+                    updatedAt
+                }
+            }
+            """
+            variables = {
+                "userId": user_id,
+                "startTime": start_date.isoformat(),
+                "endTime": end_date.isoformat()
+            }
+        else:
+            query = """
+            query GetEvents($userId: String!) {
+                events(userId: $userId) {
+                    id
+                    title
+                    description
+                    startTime
+                    endTime
+                    location
+                    category
+                    priority
+                    createdAt
+                    updatedAt
+                }
+            }
+            """
+            variables = {"userId": user_id}
+        
+        async with span("fetch"):
+            response = await self.client.post(
+                self.backend_url,
+                json={"query": query, "variables": variables}
+            )
+        response.raise_for_status()
+        
+        with span("decode"):
+            data = response.json()
+        if "errors" in data:
+            raise RuntimeError(f"GraphQL errors: {data['errors']}")
+        
+        if start_date and end_date:
+            return data.get("data", {}).get("eventsByDateRange", [])
+        else:
+            return data.get("data", {}).get("events", [])
+    
     async def detect_conflicts(self, events: List[Dict[str, Any]]) -> List[ConflictResolution]:
         """
         Detect scheduling conflicts in events
@@ -93,8 +130,8 @@ class CalendarService:
             current_event = sorted_events[i]
             next_event = sorted_events[i + 1]
             
-            current_end = datetime.fromisoformat(current_event['endTime'].replace('Z', '+00:00'))
-            next_start = datetime.fromisoformat(next_event['startTime'].replace('Z', '+00:00'))
+            current_end = parse_event_time(current_event['endTime'])
+            next_start = parse_event_time(next_event['startTime'])
             
             # Check for overlap
             if current_end > next_start:
@@ -111,6 +148,93 @@ class CalendarService:
         
         return conflicts
     
+    async def scan_conflicts_bulk(self, user_ids: List[str], start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Detect conflicts for many users, yielding each user's result as soon as it is ready,
+        followed by cross-user double-bookings of shared events
+        """
+        semaphore = asyncio.Semaphore(self.settings.bulk_conflict_max_concurrency)
+        
+        async def scan(user_id: str) -> Dict[str, Any]:
+            try:
+                async with semaphore:
+                    events = await self.fetch_user_events(user_id, start_date, end_date)
+                conflicts = await self.detect_conflicts(events)
+                return {"user_id": user_id, "events": events, "conflicts": conflicts}
+            except Exception as e:
+                logger.error(f"Error scanning conflicts for user {user_id}: {e}")
+                return {"user_id": user_id, "error": "Failed to fetch events"}
+        
+        tasks = [asyncio.create_task(scan(user_id)) for user_id in user_ids]
+        events_by_user: Dict[str, List[Dict[str, Any]]] = {}
+        
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                if "error" in result:
+                    yield {"type": "user", "user_id": result["user_id"], "error": result["error"]}
+                    continue
+                
+                events_by_user[result["user_id"]] = result["events"]
+                yield {
+                    "type": "user",
+                    "user_id": result["user_id"],
+                    "events_analyzed": len(result["events"]),
+                    "conflicts_found": len(result["conflicts"]),
+                    "conflicts": [conflict.dict() for conflict in result["conflicts"]]
+                }
+        finally:
+            # Stop outstanding fetches if the client went away mid-stream
+            for task in tasks:
+                task.cancel()
+        
+        try:
+            double_bookings = self.detect_shared_double_bookings(events_by_user)
+        except Exception as e:
+            logger.error(f"Error detecting shared double-bookings: {e}")
+            yield {"type": "error", "message": "Failed to detect shared double-bookings"}
+            return
+        yield {
+            "type": "shared",
+            "users_scanned": len(events_by_user),
+            "double_bookings_found": len(double_bookings),
+            "double_bookings": double_bookings
+        }
+    
+    def detect_shared_double_bookings(self, events_by_user: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Find shared events (same event id on several calendars) that overlap
+        another event on one of the attendees' calendars
+        """
+        attendees: Dict[str, List[str]] = {}
+        for user_id, events in events_by_user.items():
+            for event in events:
+                if event.get('id'):
+                    attendees.setdefault(event['id'], []).append(user_id)
+        
+        shared_ids = {event_id for event_id, users in attendees.items() if len(users) > 1}
+        double_bookings = []
+        
+        for user_id, events in events_by_user.items():
+            parsed = [(parse_event_time(e['startTime']), parse_event_time(e['endTime']), e) for e in events]
+            for start, end, event in parsed:
+                if event.get('id') not in shared_ids:
+                    continue
+                overlapping = [
+                    other for other_start, other_end, other in parsed
+                    if other is not event and other_start < end and start < other_end
+                ]
+                if overlapping:
+                    double_bookings.append({
+                        "event_id": event['id'],
+                        "title": event.get('title'),
+                        "user_id": user_id,
+                        "attendees": attendees[event['id']],
+                        "overlapping_events": overlapping
+                    })
+        
+        return double_bookings
+    
     async def optimize_schedule(self, request: ScheduleOptimizationRequest) -> Dict[str, Any]:
         """
         Optimize user's schedule for the given date range
@@ -130,44 +254,55 @@ class CalendarService:
                     "conflicts": []
                 }
             
-            # Detect conflicts
-            conflicts = await self.detect_conflicts(events)
-            
-            # Generate optimization suggestions
-            optimizations = []
-            
-            # Check for back-to-back meetings
-            for i in range(len(events) - 1):
-                current = events[i]
-                next_event = events[i + 1]
+            with span("analyze"):
+                # Detect conflicts
+                conflicts = await self.detect_conflicts(events)
                 
-                current_end = datetime.fromisoformat(current['endTime'].replace('Z', '+00:00'))
-                next_start = datetime.fromisoformat(next_event['startTime'].replace('Z', '+00:00'))
+                # Generate optimization suggestions
+                optimizations = []
                 
-                time_diff = (next_start - current_end).total_seconds() / 60
+                # Check for back-to-back meetings
+                for i in range(len(events) - 1):
+                    current = events[i]
+                    next_event = events[i + 1]
+                    
+                    current_end = datetime.fromisoformat(current['endTime'].replace('Z', '+00:00'))
+                    next_start = datetime.fromisoformat(next_event['startTime'].replace('Z', '+00:00'))
+                    
+                    time_diff = (next_start - current_end).total_seconds() / 60
+                    
+                    if time_diff < 15:  # Less than 15 minutes between events
+                        optimizations.append({
+                            "type": "buffer_time",
+                            "message": f"Add buffer time between '{current['title']}' and '{next_event['title']}'",
+                            "suggestion": "Consider adding 15-30 minutes between meetings for transition time"
+                        })
                 
-                if time_diff < 15:  # Less than 15 minutes between events
+                # Check for long working blocks
+                work_events = [e for e in events if e.get('category') == 'WORK']
+                if len(work_events) > 4:  # More than 4 work events in a day
                     optimizations.append({
-                        "type": "buffer_time",
-                        "message": f"Add buffer time between '{current['title']}' and '{next_event['title']}'",
-                        "suggestion": "Consider adding 15-30 minutes between meetings for transition time"
+                        "type": "break_recommendation",
+                        "message": "Heavy work schedule detected",
+                        "suggestion": "Consider scheduling breaks between work blocks for better productivity"
                     })
             
-            # Check for long working blocks
-            work_events = [e for e in events if e.get('category') == 'WORK']
-            if len(work_events) > 4:  # More than 4 work events in a day
-                optimizations.append({
-                    "type": "break_recommendation",
-                    "message": "Heavy work schedule detected",
-                    "suggestion": "Consider scheduling breaks between work blocks for better productivity"
-                })
+                # The events are already in hand, so summarise them directly rather
+                # than round-tripping the Redis day cells
+                tz = summary_timezone(request.start_date)
+                grouped = group_events_by_day(events, tz)
+                cells = [
+                    compute_day_summary(day, grouped.get(day, []), tz)
+                    for day in days_in_range(request.start_date, request.end_date)
+                ]
             
             return {
                 "message": "Schedule optimization completed",
                 "events_analyzed": len(events),
                 "conflicts_found": len(conflicts),
                 "optimizations": optimizations,
-                "conflicts": [conflict.dict() for conflict in conflicts]
+                "conflicts": [conflict.dict() for conflict in conflicts],
+                "summary": compose_summaries(cells)
             }
             
         except Exception as e:
@@ -179,6 +314,32 @@ class CalendarService:
                 "conflicts": []
             }
     
+    async def get_schedule_summary(self, user_id: str, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """
+        Get the materialized schedule summary for a date range
+        """
+        return await self.summary_store.get_range_summary(
+            user_id, start_date, end_date, self.fetch_user_events
+        )
+    
+    async def recompute_schedule_summary(self, user_id: str, days: List[date], utc_offset_minutes: int = 0) -> Dict[str, Any]:
+        """
+        Recompute the summary cells for days (calendar days at the given UTC offset)
+        whose events changed
+        """
+        days = sorted(set(days))
+        if not days:
+            return {"recomputed_days": []}
+        
+        tz = timezone(timedelta(minutes=utc_offset_minutes))
+        window_start = datetime.combine(days[0], time.min, tzinfo=tz)
+        window_end = datetime.combine(days[-1], time.max, tzinfo=tz)
+        events = await self.fetch_user_events(user_id, window_start, window_end)
+        await self.summary_store.invalidate(user_id, days, tz)
+        await self.summary_store.refresh(user_id, events, days, tz)
+        
+        return {"recomputed_days": [day.isoformat() for day in days]}
+    
     async def suggest_meeting_times(self, user_id: str, duration_minutes: int, preferred_date: datetime) -> List[Dict[str, Any]]:
         """
         Suggest available meeting times based on user's schedule
@@ -0,0 +1,157 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Any, Optional, Callable, Awaitable
+import logging
+import httpx
+from app.utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+AVAILABLE = "available"
+DEGRADED = "degraded"
+UNAVAILABLE = "unavailable"
+UNCONFIGURED = "unconfigured"
+UNKNOWN = "unknown"
+
+
+@dataclass
+class DependencyState:
+    status: str = UNKNOWN
+    checked_at: Optional[datetime] = None
+    last_latency_ms: Optional[float] = None
+    avg_latency_ms: Optional[float] = None
+    max_latency_ms: Optional[float] = None
+    checks: int = 0
+    failures: int = 0
+    error: Optional[str] = None
+    _total_latency_ms: float = field(default=0.0, repr=False)
+
+    def record(self, status: str, latency_ms: float, error: Optional[str] = None):
+        self.status = status
+        self.checked_at = datetime.now()
+        self.last_latency_ms = round(latency_ms, 2)
+        self.checks += 1
+        self._total_latency_ms += latency_ms
+        self.avg_latency_ms = round(self._total_latency_ms / self.checks, 2)
+        self.max_latency_ms = round(max(self.max_latency_ms or 0.0, latency_ms), 2)
+        if status in (DEGRADED, UNAVAILABLE):
+            self.failures += 1
+        self.error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "last_latency_ms": self.last_latency_ms,
+            "avg_latency_ms": self.avg_latency_ms,
+            "max_latency_ms": self.max_latency_ms,
+            "checks": self.checks,
+            "failures": self.failures,
+            "error": self.error
+        }
+
+
+class HealthMonitor:
+    """
+    Probes downstream dependencies on an interval and serves the cached results
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.interval = self.settings.health_check_interval_seconds
+        self.timeout = self.settings.health_check_timeout_seconds
+        self.states: Dict[str, DependencyState] = {
+            "backend_api": DependencyState(),
+            "openai": DependencyState(),
+            "redis": DependencyState(),
+        }
+        self._client: Optional[httpx.AsyncClient] = None
+        self._redis = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._client = httpx.AsyncClient(timeout=self.timeout)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self):
+        """
+        Run every dependency probe once, concurrently
+        """
+        await asyncio.gather(
+            self._probe("backend_api", self._check_backend),
+            self._probe("openai", self._check_openai),
+            self._probe("redis", self._check_redis),
+        )
+
+    async def _probe(self, name: str, check: Callable[[], Awaitable[str]]):
+        started = time.perf_counter()
+        try:
+            status = await asyncio.wait_for(check(), timeout=self.timeout)
+            error = None
+        except Exception as e:
+            status = UNAVAILABLE
+            error = str(e) or type(e).__name__
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.states[name].record(status, latency_ms, error)
+        if status in (DEGRADED, UNAVAILABLE):
+            logger.warning(f"Health probe for {name} reported {status}: {error}")
+
+    async def _check_backend(self) -> str:
+        url = f"{self.settings.backend_api_url.rstrip('/')}/actuator/health"
+        response = await self._client.get(url)
+        return AVAILABLE if response.status_code == 200 else DEGRADED
+
+    async def _check_openai(self) -> str:
+        if not self.settings.openai_api_key:
+            return UNCONFIGURED
+        response = await self._client.get(
+            f"{self.settings.openai_base_url.rstrip('/')}/models",
+            headers={"Authorization": f"Bearer {self.settings.openai_api_key}"}
+        )
+        if response.status_code == 200:
+            return AVAILABLE
+        return DEGRADED if response.status_code in (429, 500, 502, 503) else UNAVAILABLE
+
+    async def _check_redis(self) -> str:
+        if self._redis is None:
+            import redis.asyncio as redis
+            self._redis = redis.from_url(self.settings.redis_url, socket_timeout=self.timeout)
+        await self._redis.ping()
+        return AVAILABLE
+
+    def dependency_statuses(self) -> Dict[str, str]:
+        return {name: state.status for name, state in self.states.items()}
+
+    def dependency_details(self) -> Dict[str, Dict[str, Any]]:
+        return {name: state.to_dict() for name, state in self.states.items()}
+
+    def is_ready(self) -> bool:
+        """
+        Ready once every required dependency has been seen available on the last probe
+        """
+        required = self.settings.health_required_dependencies
+        return all(self.states[name].status == AVAILABLE for name in required if name in self.states)
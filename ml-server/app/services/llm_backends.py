@@ -0,0 +1,306 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, AsyncIterator
+import logging
+import openai
+from app.utils.config import Settings
+
+logger = logging.getLogger(__name__)
+
+Messages = List[Dict[str, str]]
+
+
+class OutputTruncated(Exception):
+    """
+    Raised by a stream after its last chunk when the model stopped at the token limit
+    """
+
+
+class LLMBackend(ABC):
+    """
+    A chat-completion style model that turns messages into text
+    """
+
+    name: str = "base"
+    supports_tools: bool = False
+
+    @abstractmethod
+    async def complete(self, messages: Messages, max_tokens: int, temperature: float) -> str:
+        ...
+
+    async def stream(
+        self,
+        messages: Messages,
+        max_tokens: int,
+        temperature: float,
+        tool: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield output text as it is produced. When ``tool`` is given and the backend
+        supports it, the model is forced to call that function and the yielded text
+        is the function arguments JSON. The default yields the full completion once.
+        Raises OutputTruncated after the last chunk if the output hit ``max_tokens``.
+        """
+        yield await self.complete(messages, max_tokens, temperature)
+
+    def available(self) -> bool:
+        """
+        Whether the backend is worth routing to right now
+        """
+        return True
+
+    async def close(self):
+        pass
+
+
+class OpenAIBackend(LLMBackend):
+    """
+    OpenAI (or any OpenAI-compatible server) over HTTP
+    """
+
+    name = "openai"
+    supports_tools = True
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.model = settings.openai_model
+        self.client = openai.AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url
+        )
+
+    async def complete(self, messages: Messages, max_tokens: int, temperature: float) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        return (response.choices[0].message.content or "").strip()
+
+    async def stream(
+        self,
+        messages: Messages,
+        max_tokens: int,
+        temperature: float,
+        tool: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        kwargs = {}
+        if tool is not None:
+            kwargs["tools"] = [{"type": "function", "function": tool}]
+            kwargs["tool_choice"] = {"type": "function", "function": {"name": tool["name"]}}
+
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+            **kwargs
+        )
+        finish_reason = None
+        async for chunk in response:
+            if not chunk.choices:
+                continue
+            finish_reason = chunk.choices[0].finish_reason or finish_reason
+            delta = chunk.choices[0].delta
+            if tool is not None:
+                for tool_call in delta.tool_calls or []:
+                    if tool_call.function and tool_call.function.arguments:
+                        yield tool_call.function.arguments
+            elif delta.content:
+                yield delta.content
+        if finish_reason == "length":
+            raise OutputTruncated(f"{self.name} output was cut off at max_tokens={max_tokens}")
+
+    async def close(self):
+        await self.client.close()
+
+
+@dataclass
+class _PendingGeneration:
+    prompt: str
+    max_tokens: int
+    future: asyncio.Future
+
+
+class LocalTransformersBackend(LLMBackend):
+    """
+    Small instruction-tuned model running in-process on CPU via transformers.
+
+    Concurrent requests are collected for up to ``llm_local_batch_wait_ms`` and
+    generated together (up to ``llm_local_batch_size``) so one forward pass
+    serves several callers. Decoding is greedy, which suits JSON extraction.
+    After a failed model load the backend reports itself unavailable for
+    ``llm_local_load_retry_seconds`` instead of retrying on every request.
+    """
+
+    name = "local"
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.model_name = settings.llm_local_model
+        self.batch_size = settings.llm_local_batch_size
+        self.batch_wait = settings.llm_local_batch_wait_ms / 1000
+        self._tokenizer = None
+        self._model = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._load_lock = asyncio.Lock()
+        self._load_failed_at: Optional[float] = None
+
+    def available(self) -> bool:
+        if self._model is not None or self._load_failed_at is None:
+            return True
+        return time.monotonic() - self._load_failed_at >= self.settings.llm_local_load_retry_seconds
+
+    async def _ensure_loaded(self):
+        if not self.available():
+            raise RuntimeError(f"local LLM {self.model_name} unavailable after a failed load")
+        async with self._load_lock:
+            if self._model is not None:
+                return
+            if not self.available():
+                raise RuntimeError(f"local LLM {self.model_name} unavailable after a failed load")
+            try:
+                self._tokenizer, self._model = await asyncio.to_thread(self._load)
+            except Exception:
+                self._load_failed_at = time.monotonic()
+                logger.error(
+                    f"Could not load local LLM {self.model_name}; "
+                    f"routing to remote for {self.settings.llm_local_load_retry_seconds}s"
+                )
+                raise
+            self._load_failed_at = None
+            logger.info(f"Loaded local LLM {self.model_name}")
+
+    def _load(self):
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name, padding_side="left")
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        model = AutoModelForCausalLM.from_pretrained(self.model_name, torch_dtype=torch.float32)
+        model.eval()
+        if self.settings.llm_local_quantize:
+            # int8 dynamic quantization of the linear layers; CPU only
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return tokenizer, model
+
+    def _build_prompt(self, messages: Messages) -> str:
+        if getattr(self._tokenizer, "chat_template", None):
+            return self._tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+        lines = [f"{m['role']}: {m['content'].strip()}" for m in messages]
+        return "\n\n".join(lines) + "\n\nassistant:"
+
+    def _generate_batch(self, prompts: List[str], max_tokens: int) -> List[str]:
+        import torch
+
+        inputs = self._tokenizer(prompts, return_tensors="pt", padding=True)
+        with torch.no_grad():
+            output = self._model.generate(
+                **inputs,
+                max_new_tokens=max_tokens,
+                do_sample=False,
+                pad_token_id=self._tokenizer.pad_token_id
+            )
+        generated = output[:, inputs["input_ids"].shape[1]:]
+        return [text.strip() for text in self._tokenizer.batch_decode(generated, skip_special_tokens=True)]
+
+    @staticmethod
+    def _fail(items: List[_PendingGeneration], error: Exception):
+        for item in items:
+            if not item.future.done():
+                item.future.set_exception(error)
+
+    async def _run_batches(self):
+        batch: List[_PendingGeneration] = []
+        try:
+            while True:
+                first = await self._queue.get()
+                batch = [first]
+                deadline = asyncio.get_running_loop().time() + self.batch_wait
+                while len(batch) < self.batch_size:
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+                batch = [item for item in batch if not item.future.done()]
+                if not batch:
+                    continue
+                try:
+                    texts = await asyncio.to_thread(
+                        self._generate_batch,
+                        [item.prompt for item in batch],
+                        max(item.max_tokens for item in batch)
+                    )
+                    for item, text in zip(batch, texts):
+                        if not item.future.done():
+                            item.future.set_result(text)
+                except Exception as e:
+                    self._fail(batch, e)
+        except asyncio.CancelledError:
+            # Closed mid-batch: callers waiting on this batch must not hang
+            self._fail(batch, RuntimeError("local LLM backend closed"))
+            raise
+
+    async def complete(self, messages: Messages, max_tokens: int, temperature: float) -> str:
+        await self._ensure_loaded()
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run_batches())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_PendingGeneration(self._build_prompt(messages), max_tokens, future))
+        return await future
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        # Fail anything still queued so its caller can fall back instead of waiting forever
+        if self._queue is not None:
+            pending = []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            self._fail(pending, RuntimeError("local LLM backend closed"))
+            self._queue = None
+
+
+class LLMRouter:
+    """
+    Picks the local backend for short inputs on tasks it is enabled for (while it
+    is available), and the remote backend otherwise
+    """
+
+    def __init__(self, settings: Settings, remote: LLMBackend, local: Optional[LLMBackend] = None):
+        self.settings = settings
+        self.remote = remote
+        self.local = local
+
+    def select(self, task: str, input_text: str) -> LLMBackend:
+        """
+        Route on the raw input (e.g. the user's text), not the prompt built around it
+        """
+        if self.local is None or task not in self.settings.llm_local_tasks:
+            return self.remote
+        if len(input_text) > self.settings.llm_local_max_input_chars or not self.local.available():
+            return self.remote
+        return self.local
+
+    async def close(self):
+        await self.remote.close()
+        if self.local is not None:
+            await self.local.close()
+
+
+def create_llm_router(settings: Settings) -> LLMRouter:
+    local = LocalTransformersBackend(settings) if settings.llm_local_enabled else None
+    return LLMRouter(settings, remote=OpenAIBackend(settings), local=local)
@@ -1,83 +1,209 @@
-import openai
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
 import json
 import logging
 from app.utils.config import get_settings
 from app.models.schemas import EventSuggestion, NaturalLanguageRequest
+from app.services.semantic_cache import SemanticCache
+from app.utils.profiling import span
+from app.utils.json_stream import IncrementalObjectParser, inline_schema_refs, loads_with_repair
+from app.services.llm_backends import LLMBackend, Messages, OutputTruncated, create_llm_router
 
 logger = logging.getLogger(__name__)
 
+# Function-calling schema derived from EventSuggestion so the model must return well-formed events
+EVENT_EXTRACTION_TOOL = {
+    "name": "record_events",
+    "description": "Record the calendar events extracted from the user input",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "events": {
+                "type": "array",
+                "items": inline_schema_refs(EventSuggestion.model_json_schema())
+            }
+        },
+        "required": ["events"]
+    }
+}
+
 class OpenAIService:
     def __init__(self):
         self.settings = get_settings()
-        openai.api_key = self.settings.openai_api_key
-        self.client = openai.OpenAI(api_key=self.settings.openai_api_key)
+        self.llm_router = create_llm_router(self.settings)
+        self.semantic_cache = SemanticCache() if self.settings.semantic_cache_enabled else None
     
-    async def parse_natural_language_event(self, request: NaturalLanguageRequest) -> List[EventSuggestion]:
+    async def _complete(self, task: str, messages: Messages, input_text: str) -> Tuple[str, LLMBackend]:
         """
-        Parse natural language input and extract event information using OpenAI
+        Run a completion on the backend the router picks for ``input_text``, falling back
+        to remote if local fails
         """
+        backend = self.llm_router.select(task, input_text)
         try:
-            system_prompt = """
-            You are an AI assistant that helps parse natural language into calendar events.
-            Extract event information from user input and return structured data.
-            
-            For each event mentioned, extract:
-            - title: A clear, concise title
-            - description: Additional details (optional)
-            - suggested_start_time: ISO format datetime
-            - suggested_end_time: ISO format datetime
-            - location: Physical or virtual location (optional)
-            - category: One of WORK, PERSONAL, HEALTH, SOCIAL, EDUCATION, TRAVEL
-            - priority: One of LOW, MEDIUM, HIGH, URGENT
-            - confidence_score: Float between 0.0 and 1.0
-            
-            Return valid JSON array of event objects.
-            If time is not specified, suggest reasonable defaults based on event type.
-            If date is not specified, assume the user means the next occurrence.
-            """
-            
-            user_prompt = f"""
-            Parse this user input into calendar events:
-            "{request.text}"
-            
-            User ID: {request.user_id}
-            Additional context: {request.context or {}}
-            
-            Return only valid JSON array.
-            """
-            
-            response = self.client.chat.completions.create(
-                model=self.settings.openai_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=self.settings.openai_max_tokens,
-                temperature=self.settings.openai_temperature
+            async with span(f"llm:{backend.name}"):
+                content = await backend.complete(
+                    messages, self.settings.openai_max_tokens, self.settings.openai_temperature
+                )
+            return content, backend
+        except Exception as e:
+            if backend is self.llm_router.remote:
+                raise
+            logger.warning(f"Local LLM failed for {task}, falling back to remote: {e}")
+        
+        remote = self.llm_router.remote
+        async with span(f"llm:{remote.name}"):
+            content = await remote.complete(
+                messages, self.settings.openai_max_tokens, self.settings.openai_temperature
             )
-            
-            content = response.choices[0].message.content.strip()
-            
-            # Try to parse JSON response
+        return content, remote
+    
+    def _is_confident(self, suggestions: List[EventSuggestion]) -> bool:
+        if not suggestions:
+            return False
+        average = sum(s.confidence_score for s in suggestions) / len(suggestions)
+        return average >= self.settings.llm_local_min_confidence
+    
+    @staticmethod
+    def _to_suggestion(event_data: Dict[str, Any]) -> Optional[EventSuggestion]:
+        try:
+            return EventSuggestion(**event_data)
+        except (TypeError, ValueError) as e:
+            # Drop the one bad event rather than the whole answer
+            logger.warning(f"LLM event did not match the event schema: {e}")
+            return None
+    
+    @staticmethod
+    def _build_parse_messages(request: NaturalLanguageRequest) -> Messages:
+        system_prompt = """
+        You are an AI assistant that helps parse natural language into calendar events.
+        Extract event information from user input and return structured data.
+        
+        For each event mentioned, extract:
+        - title: A clear, concise title
+        - description: Additional details (optional)
+        - suggested_start_time: ISO format datetime
+        - suggested_end_time: ISO format datetime
+        - location: Physical or virtual location (optional)
+        - category: One of WORK, PERSONAL, HEALTH, SOCIAL, EDUCATION, TRAVEL
+        - priority: One of LOW, MEDIUM, HIGH, URGENT
+        - confidence_score: Float between 0.0 and 1.0
+        
+        Return valid JSON array of event objects.
+        If time is not specified, suggest reasonable defaults based on event type.
+        If date is not specified, assume the user means the next occurrence.
+        """
+        
+        user_prompt = f"""
+        Parse this user input into calendar events:
+        "{request.text}"
+        
+        User ID: {request.user_id}
+        Additional context: {request.context or {}}
+        
+        Return only valid JSON array.
+        """
+        
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    async def _stream_event_suggestions(self, backend: LLMBackend, messages: Messages) -> AsyncIterator[EventSuggestion]:
+        """
+        Stream one backend's answer, validating and yielding each event as soon as its object closes.
+        Raises OutputTruncated after the recoverable events if the answer was cut short.
+        """
+        parser = IncrementalObjectParser()
+        tool = EVENT_EXTRACTION_TOOL if backend.supports_tools else None
+        truncated: Optional[OutputTruncated] = None
+        
+        async with span(f"llm:{backend.name}"):
             try:
-                events_data = json.loads(content)
-                suggestions = []
-                
-                for event_data in events_data:
-                    suggestion = EventSuggestion(**event_data)
+                async for chunk in backend.stream(
+                    messages,
+                    self.settings.openai_max_tokens,
+                    self.settings.openai_temperature,
+                    tool=tool
+                ):
+                    for event_data in parser.feed(chunk):
+                        suggestion = self._to_suggestion(event_data)
+                        if suggestion is not None:
+                            yield suggestion
+            except OutputTruncated as e:
+                truncated = e
+        
+        # Repair pass for output that never produced a complete array element
+        for event_data in parser.finish():
+            suggestion = self._to_suggestion(event_data)
+            if suggestion is not None:
+                yield suggestion
+        
+        if not parser.emitted:
+            logger.debug(f"Raw LLM response: {parser.text}")
+        
+        # Backends that cannot report the stop reason still leave the JSON unclosed
+        if truncated is None and parser.unclosed:
+            truncated = OutputTruncated(f"{backend.name} output ended inside unclosed JSON")
+        if truncated is not None:
+            raise truncated
+    
+    async def stream_natural_language_event(self, request: NaturalLanguageRequest) -> AsyncIterator[EventSuggestion]:
+        """
+        Parse natural language input into events, yielding each event as soon as it is decoded
+        """
+        if self.semantic_cache:
+            cached = await self.semantic_cache.lookup(request)
+            if cached is not None:
+                for suggestion in cached:
+                    yield suggestion
+                return
+        
+        messages = self._build_parse_messages(request)
+        remote = self.llm_router.remote
+        backend = self.llm_router.select("parse_event", request.text)
+        suggestions: List[EventSuggestion] = []
+        
+        if backend is not remote:
+            # Local answers are buffered so low-confidence ones can be replaced by the remote model
+            try:
+                local = [s async for s in self._stream_event_suggestions(backend, messages)]
+            except Exception as e:
+                logger.warning(f"Local LLM failed for parse_event, falling back to remote: {e}")
+                local = []
+            if self._is_confident(local):
+                for suggestion in local:
                     suggestions.append(suggestion)
-                
-                return suggestions
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse OpenAI JSON response: {e}")
-                logger.error(f"Raw response: {content}")
-                return []
-                
+                    yield suggestion
+            else:
+                logger.info(f"Local parse not confident for user {request.user_id}, escalating to remote")
+                backend = remote
+        
+        if backend is remote:
+            async for suggestion in self._stream_event_suggestions(remote, messages):
+                suggestions.append(suggestion)
+                yield suggestion
+        
+        # Only reached when the answer was complete, so cut-short results are never cached
+        if suggestions and self.semantic_cache:
+            await self.semantic_cache.store(request, suggestions)
+    
+    async def parse_natural_language_event(self, request: NaturalLanguageRequest) -> Tuple[List[EventSuggestion], bool]:
+        """
+        Parse natural language input and extract event information using the routed LLM.
+        Returns the suggestions and whether they are partial (the stream failed or the
+        model's output was truncated).
+        """
+        suggestions = []
+        try:
+            async for suggestion in self.stream_natural_language_event(request):
+                suggestions.append(suggestion)
+        except OutputTruncated as e:
+            logger.warning(f"Parsed events may be incomplete: {e}")
+            return suggestions, True
         except Exception as e:
+            # Keep whatever was decoded before the failure instead of wasting the call
             logger.error(f"Error parsing natural language with OpenAI: {e}")
-            return []
+            return suggestions, True
+        return suggestions, False
     
     async def suggest_schedule_optimization(self, events: List[Dict[str, Any]], preferences: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -102,30 +228,25 @@ class OpenAIService:
             - recommendations: Array of general recommendations
             """
             
+            events_json = json.dumps(events, default=str)
+            preferences_json = json.dumps(preferences)
             user_prompt = f"""
             Optimize this schedule:
-            Events: {json.dumps(events, default=str)}
-            User preferences: {json.dumps(preferences)}
+            Events: {events_json}
+            User preferences: {preferences_json}
             
             Provide optimization suggestions in JSON format.
             """
             
-            response = self.client.chat.completions.create(
-                model=self.settings.openai_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=self.settings.openai_max_tokens,
-                temperature=self.settings.openai_temperature
-            )
-            
-            content = response.choices[0].message.content.strip()
+            content, _ = await self._complete("optimize_schedule", [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ], events_json + preferences_json)
             
-            try:
-                return json.loads(content)
-            except json.JSONDecodeError:
-                return {"optimizations": [], "conflicts": [], "recommendations": []}
+            result = loads_with_repair(content)
+            if isinstance(result, dict):
+                return result
+            return {"optimizations": [], "conflicts": [], "recommendations": []}
                 
         except Exception as e:
             logger.error(f"Error getting schedule optimization: {e}")
@@ -141,24 +262,20 @@ class OpenAIService:
             Generate a professional summary based on the meeting details provided.
             """
             
+            details_json = json.dumps(meeting_details, default=str)
             user_prompt = f"""
             Generate a meeting summary for:
-            {json.dumps(meeting_details, default=str)}
+            {details_json}
             
             Include key points, decisions made, and action items if any.
             """
             
-            response = self.client.chat.completions.create(
-                model=self.settings.openai_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=self.settings.openai_max_tokens,
-                temperature=self.settings.openai_temperature
-            )
+            content, _ = await self._complete("summary", [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ], details_json)
             
-            return response.choices[0].message.content.strip()
+            return content
             
         except Exception as e:
             logger.error(f"Error generating meeting summary: {e}")
@@ -0,0 +1,268 @@
+import hashlib
+import json
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+import logging
+from app.utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (minutes) of the gap histogram buckets; the last bucket is open-ended
+GAP_BUCKETS = [(15, "lt_15m"), (30, "15_30m"), (60, "30_60m"), (120, "1_2h")]
+GAP_OVERFLOW_BUCKET = "gte_2h"
+
+# Focus blocks are measured inside working hours, matching suggest_meeting_times
+WORK_DAY_START_HOUR = 9
+WORK_DAY_END_HOUR = 18
+
+BACK_TO_BACK_MINUTES = 15
+
+
+def parse_event_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    # Naive timestamps are UTC like the backend's, so they compare with aware ones
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def summary_timezone(moment: datetime) -> tzinfo:
+    """
+    Timezone whose calendar days a request's summary cells are keyed by (naive means UTC)
+    """
+    return moment.tzinfo or timezone.utc
+
+
+def _gap_bucket(minutes: float) -> str:
+    for upper, name in GAP_BUCKETS:
+        if minutes < upper:
+            return name
+    return GAP_OVERFLOW_BUCKET
+
+
+def empty_summary() -> Dict[str, Any]:
+    return {
+        "event_count": 0,
+        "work_event_count": 0,
+        "busy_minutes_by_category": {},
+        "gap_histogram": {name: 0 for _, name in GAP_BUCKETS} | {GAP_OVERFLOW_BUCKET: 0},
+        "back_to_back_count": 0,
+        "conflict_count": 0,
+        "longest_focus_block_minutes": 0
+    }
+
+
+def events_fingerprint(events: List[Dict[str, Any]]) -> str:
+    relevant = sorted(
+        (e.get('id') or "", e['startTime'], e['endTime'], e.get('category') or "")
+        for e in events
+    )
+    return hashlib.sha1(json.dumps(relevant).encode("utf-8")).hexdigest()
+
+
+def compute_day_summary(day: date, events: List[Dict[str, Any]], tz: tzinfo = timezone.utc) -> Dict[str, Any]:
+    """
+    Aggregate one day (a calendar day in ``tz``) of events into a summary cell
+    """
+    summary = empty_summary()
+    summary["event_count"] = len(events)
+    if not events:
+        summary["longest_focus_block_minutes"] = (WORK_DAY_END_HOUR - WORK_DAY_START_HOUR) * 60
+        return summary
+
+    intervals = sorted(
+        ((parse_event_time(e['startTime']), parse_event_time(e['endTime']), e) for e in events),
+        key=lambda interval: (interval[0], interval[1])
+    )
+    day_end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=tz)
+
+    busy = defaultdict(float)
+    for start, end, event in intervals:
+        category = event.get('category') or "UNCATEGORIZED"
+        busy[category] += max((min(end, day_end) - start).total_seconds() / 60, 0)
+        if category == 'WORK':
+            summary["work_event_count"] += 1
+    summary["busy_minutes_by_category"] = {k: round(v, 1) for k, v in busy.items()}
+
+    latest_end = intervals[0][1]
+    for i in range(len(intervals) - 1):
+        current_end = intervals[i][1]
+        next_start = intervals[i + 1][0]
+        if current_end > next_start:
+            summary["conflict_count"] += 1
+        if (next_start - current_end).total_seconds() / 60 < BACK_TO_BACK_MINUTES:
+            summary["back_to_back_count"] += 1
+
+        latest_end = max(latest_end, current_end)
+        gap_minutes = (next_start - latest_end).total_seconds() / 60
+        if gap_minutes > 0:
+            summary["gap_histogram"][_gap_bucket(gap_minutes)] += 1
+
+    work_start = datetime.combine(day, time(hour=WORK_DAY_START_HOUR), tzinfo=tz)
+    work_end = datetime.combine(day, time(hour=WORK_DAY_END_HOUR), tzinfo=tz)
+    longest = timedelta(0)
+    cursor = work_start
+    for start, end, _ in intervals:
+        if start > cursor:
+            longest = max(longest, min(start, work_end) - cursor)
+        cursor = max(cursor, end)
+        if cursor >= work_end:
+            break
+    if cursor < work_end:
+        longest = max(longest, work_end - cursor)
+    summary["longest_focus_block_minutes"] = int(longest.total_seconds() // 60)
+
+    return summary
+
+
+def compose_summaries(cells: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine day cells into a range summary (sums, except the focus block which is a max)
+    """
+    total = empty_summary()
+    for cell in cells:
+        for key in ("event_count", "work_event_count", "back_to_back_count", "conflict_count"):
+            total[key] += cell.get(key, 0)
+        for category, minutes in cell.get("busy_minutes_by_category", {}).items():
+            total["busy_minutes_by_category"][category] = round(
+                total["busy_minutes_by_category"].get(category, 0) + minutes, 1
+            )
+        for bucket, count in cell.get("gap_histogram", {}).items():
+            total["gap_histogram"][bucket] = total["gap_histogram"].get(bucket, 0) + count
+        total["longest_focus_block_minutes"] = max(
+            total["longest_focus_block_minutes"], cell.get("longest_focus_block_minutes", 0)
+        )
+    return total
+
+
+def days_in_range(start: datetime, end: datetime) -> List[date]:
+    days = []
+    current = start.date()
+    while current <= end.date():
+        days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+def group_events_by_day(events: List[Dict[str, Any]], tz: tzinfo = timezone.utc) -> Dict[date, List[Dict[str, Any]]]:
+    """
+    Group events by the calendar day in ``tz`` on which they start
+    """
+    grouped = defaultdict(list)
+    for event in events:
+        grouped[parse_event_time(event['startTime']).astimezone(tz).date()].append(event)
+    return grouped
+
+
+class ScheduleSummaryStore:
+    """
+    Per-user, per-day schedule summaries materialized in Redis
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.ttl_seconds = self.settings.schedule_summary_ttl_seconds
+        self._redis = None
+
+    def _client(self):
+        if self._redis is None:
+            import redis.asyncio as redis
+            self._redis = redis.from_url(
+                self.settings.redis_url,
+                socket_timeout=self.settings.schedule_summary_redis_timeout_seconds,
+                socket_connect_timeout=self.settings.schedule_summary_redis_timeout_seconds
+            )
+        return self._redis
+
+    @staticmethod
+    def _key(user_id: str, day: date, tz: tzinfo) -> str:
+        # A day cell only holds for the UTC offset its day boundaries were computed in
+        offset = datetime.combine(day, time(12), tzinfo=tz).strftime("%z")
+        return f"schedule_summary:{user_id}:{offset}:{day.isoformat()}"
+
+    async def get_cells(self, user_id: str, days: List[date], tz: tzinfo) -> Dict[date, Optional[Dict[str, Any]]]:
+        if not days:
+            return {}
+        try:
+            raw = await self._client().mget([self._key(user_id, day, tz) for day in days])
+        except Exception as e:
+            logger.error(f"Error reading schedule summaries from Redis: {e}")
+            return {day: None for day in days}
+        return {day: json.loads(value) if value else None for day, value in zip(days, raw)}
+
+    async def refresh(
+        self,
+        user_id: str,
+        events: List[Dict[str, Any]],
+        days: List[date],
+        tz: tzinfo
+    ) -> Dict[date, Dict[str, Any]]:
+        """
+        Recompute the given days (calendar days in ``tz``) from events, writing only
+        cells whose events changed
+        """
+        grouped = group_events_by_day(events, tz)
+        existing = await self.get_cells(user_id, days, tz)
+        cells = {}
+        changed = {}
+
+        for day in days:
+            day_events = grouped.get(day, [])
+            fingerprint = events_fingerprint(day_events)
+            cached = existing.get(day)
+            if cached and cached.get("fingerprint") == fingerprint:
+                cells[day] = cached
+                continue
+            cell = compute_day_summary(day, day_events, tz)
+            cell["fingerprint"] = fingerprint
+            cells[day] = cell
+            changed[day] = cell
+
+        if changed:
+            try:
+                pipe = self._client().pipeline(transaction=False)
+                for day, cell in changed.items():
+                    pipe.set(self._key(user_id, day, tz), json.dumps(cell), ex=self.ttl_seconds)
+                await pipe.execute()
+            except Exception as e:
+                logger.error(f"Error writing schedule summaries to Redis: {e}")
+
+        return cells
+
+    async def invalidate(self, user_id: str, days: List[date], tz: tzinfo):
+        if not days:
+            return
+        try:
+            await self._client().delete(*[self._key(user_id, day, tz) for day in days])
+        except Exception as e:
+            logger.error(f"Error invalidating schedule summaries in Redis: {e}")
+
+    async def get_range_summary(
+        self,
+        user_id: str,
+        start: datetime,
+        end: datetime,
+        fetch_events: Callable[[str, datetime, datetime], Awaitable[List[Dict[str, Any]]]]
+    ) -> Dict[str, Any]:
+        """
+        Compose a range summary from day cells, materializing any missing days first
+        """
+        tz = summary_timezone(start)
+        days = days_in_range(start, end)
+        cells = await self.get_cells(user_id, days, tz)
+        missing = [day for day, cell in cells.items() if cell is None]
+
+        if missing:
+            window_start = datetime.combine(min(missing), time.min, tzinfo=tz)
+            window_end = datetime.combine(max(missing), time.max, tzinfo=tz)
+            events = await fetch_events(user_id, window_start, window_end)
+            cells.update(await self.refresh(user_id, events, missing, tz))
+
+        return {
+            "days": len(days),
+            "materialized_days": len(days) - len(missing),
+            "summary": compose_summaries([cells[day] for day in days]),
+            "daily": {
+                day.isoformat(): {k: v for k, v in cells[day].items() if k != "fingerprint"}
+                for day in days
+            }
+        }
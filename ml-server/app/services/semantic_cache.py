@@ -0,0 +1,383 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+import numpy as np
+from app.utils.config import get_settings
+from app.models.schemas import EventSuggestion, NaturalLanguageRequest
+
+logger = logging.getLogger(__name__)
+
+# Common shorthand that should not make two requests look different
+_SHORTHAND = [
+    (re.compile(r"\bw/o\b", re.IGNORECASE), "without"),
+    (re.compile(r"\bw/", re.IGNORECASE), "with "),
+    (re.compile(r"\bmtg\b", re.IGNORECASE), "meeting"),
+    (re.compile(r"\btmrw\b|\btmr\b", re.IGNORECASE), "tomorrow"),
+    (re.compile(r"&"), " and "),
+]
+
+# "3", "3pm", "3:30 pm", "15:00", "at 3"; trailing whitespace is left in place
+_TIME_PATTERN = re.compile(
+    r"\b(?:at\s+)?(\d{1,2})(?::(\d{2}))?(?:\s*(am|pm|a\.m\.|p\.m\.))?(?!\w)",
+    re.IGNORECASE
+)
+
+_WEEKDAYS = r"monday|tuesday|wednesday|thursday|friday|saturday|sunday|mon|tue|tues|wed|thu|thur|thurs|fri|sat|sun"
+_MONTHS = (
+    r"january|february|march|april|may|june|july|august|september|october|november|december"
+    r"|jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec"
+)
+
+# Relative days, weekdays, "May 5th", "5 May", "the 21st", "10/20", "2026-10-20"
+_DATE_PATTERN = re.compile(
+    rf"\b(?:day after tomorrow|today|tonight|tomorrow|yesterday"
+    rf"|(?:(?:next|this|coming)\s+)?(?:{_WEEKDAYS})"
+    rf"|(?:{_MONTHS})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?"
+    rf"|\d{{1,2}}(?:st|nd|rd|th)?\s+(?:of\s+)?(?:{_MONTHS})"
+    rf"|the\s+\d{{1,2}}(?:st|nd|rd|th)"
+    rf"|\d{{4}}-\d{{1,2}}-\d{{1,2}}|\d{{1,2}}/\d{{1,2}}(?:/\d{{2,4}})?"
+    rf"|next\s+week|this\s+weekend|next\s+weekend|weekend)(?!\w)",
+    re.IGNORECASE
+)
+
+# "30 minutes", "2 hours", "1.5 hrs", "an hour", "half an hour"
+_DURATION_PATTERN = re.compile(
+    r"\b(?:half an hour|an hour|(\d+(?:\.\d+)?)\s*(hours?|hrs?|minutes?|mins?))(?!\w)",
+    re.IGNORECASE
+)
+
+# Capitalised words that are not at the start of the text are treated as names
+_ENTITY_PATTERN = re.compile(r"(?<=\s)([A-Z][a-zA-Z'\-]+)")
+
+_NON_ENTITY_WORDS = {
+    "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday",
+    "January", "February", "March", "April", "May", "June", "July", "August",
+    "September", "October", "November", "December", "I", "AM", "PM",
+}
+
+
+@dataclass
+class ExtractedSlots:
+    template: str
+    times: List[Tuple[int, int]] = field(default_factory=list)
+    entities: List[str] = field(default_factory=list)
+    dates: List[str] = field(default_factory=list)
+    durations: List[float] = field(default_factory=list)
+
+
+@dataclass
+class _CacheEntry:
+    user_id: str
+    slots: ExtractedSlots
+    suggestions: List[EventSuggestion]
+    created_at: float
+    created_on: date
+    row: int = -1
+
+
+def extract_slots(text: str) -> ExtractedSlots:
+    """
+    Replace dates, durations, times and named entities with placeholders so
+    paraphrases share a template
+    """
+    normalized = text.strip()
+    for pattern, replacement in _SHORTHAND:
+        normalized = pattern.sub(replacement, normalized)
+
+    dates = []
+
+    def _replace_date(match: re.Match) -> str:
+        dates.append(re.sub(r"\s+", " ", match.group(0).lower()))
+        return "<date>"
+
+    normalized = _DATE_PATTERN.sub(_replace_date, normalized)
+
+    durations = []
+
+    def _replace_duration(match: re.Match) -> str:
+        phrase = match.group(0).lower()
+        if phrase == "half an hour":
+            minutes = 30.0
+        elif phrase == "an hour":
+            minutes = 60.0
+        else:
+            minutes = float(match.group(1)) * (60 if match.group(2).lower().startswith("h") else 1)
+        durations.append(minutes)
+        return "<duration>"
+
+    normalized = _DURATION_PATTERN.sub(_replace_duration, normalized)
+
+    entities = []
+    for match in _ENTITY_PATTERN.finditer(normalized):
+        word = match.group(1)
+        if word not in _NON_ENTITY_WORDS and word not in entities:
+            entities.append(word)
+    for entity in entities:
+        normalized = re.sub(rf"\b{re.escape(entity)}\b", "<name>", normalized)
+
+    times = []
+
+    def _replace_time(match: re.Match) -> str:
+        hour = int(match.group(1))
+        minute = int(match.group(2) or 0)
+        meridiem = (match.group(3) or "").lower().replace(".", "")
+        if hour > 23 or minute > 59:
+            return match.group(0)
+        if meridiem == "pm" and hour < 12:
+            hour += 12
+        elif meridiem == "am" and hour == 12:
+            hour = 0
+        elif not meridiem and not match.group(2) and not match.group(0).lower().startswith("at"):
+            # A bare number without "at", ":mm" or am/pm is not a time ("2 people")
+            return match.group(0)
+        elif not meridiem and 1 <= hour <= 7:
+            # "coffee at 3" almost always means the afternoon
+            hour += 12
+        times.append((hour, minute))
+        return "<time>"
+
+    normalized = _TIME_PATTERN.sub(_replace_time, normalized)
+    normalized = re.sub(r"\s+", " ", normalized).strip().lower()
+
+    return ExtractedSlots(
+        template=normalized, times=times, entities=entities, dates=dates, durations=durations
+    )
+
+
+class SemanticCache:
+    """
+    In-memory nearest-neighbour cache of parsed events keyed by sentence embeddings.
+
+    Entries are scoped per user, since titles, descriptions and locations are
+    copied from the cached answer. Embeddings live in one preallocated matrix,
+    one row per entry, so a lookup only gathers the requesting user's rows.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.threshold = self.settings.semantic_cache_threshold
+        self.max_entries = self.settings.semantic_cache_max_entries
+        self.ttl_seconds = self.settings.semantic_cache_ttl_seconds
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._free_rows: List[int] = list(reversed(range(self.max_entries)))
+        self._user_rows: Dict[str, Dict[int, int]] = {}
+        self._next_id = 0
+        self._tokenizer = None
+        self._model = None
+        self._model_lock = asyncio.Lock()
+        self._load_failed_at: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _model_available(self) -> bool:
+        # After a failed load, skip the cache entirely until the retry interval has passed
+        if self._model is not None:
+            return True
+        if self._load_failed_at is None:
+            return True
+        return time.monotonic() - self._load_failed_at >= self.settings.semantic_cache_load_retry_seconds
+
+    async def _load_model(self):
+        async with self._model_lock:
+            if self._model is not None:
+                return
+            if not self._model_available():
+                raise RuntimeError("embedding model unavailable")
+
+            def _load():
+                from transformers import AutoModel, AutoTokenizer
+
+                tokenizer = AutoTokenizer.from_pretrained(self.settings.semantic_cache_model)
+                model = AutoModel.from_pretrained(self.settings.semantic_cache_model)
+                model.eval()
+                return tokenizer, model
+
+            try:
+                self._tokenizer, self._model = await asyncio.to_thread(_load)
+            except Exception:
+                self._load_failed_at = time.monotonic()
+                logger.error(
+                    f"Could not load semantic cache model {self.settings.semantic_cache_model}; "
+                    f"cache disabled for {self.settings.semantic_cache_load_retry_seconds}s"
+                )
+                raise
+            self._load_failed_at = None
+            logger.info(f"Loaded semantic cache embedding model {self.settings.semantic_cache_model}")
+
+    def _embed_sync(self, text: str) -> np.ndarray:
+        import torch
+
+        inputs = self._tokenizer(text, return_tensors="pt", truncation=True, max_length=128)
+        with torch.no_grad():
+            output = self._model(**inputs).last_hidden_state
+        mask = inputs["attention_mask"].unsqueeze(-1).float()
+        pooled = (output * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        vector = pooled[0].numpy().astype(np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-9)
+
+    async def _embed(self, text: str) -> np.ndarray:
+        await self._load_model()
+        return await asyncio.to_thread(self._embed_sync, text)
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        today = date.today()
+        expired = [
+            entry_id for entry_id, entry in self._entries.items()
+            if now - entry.created_at > self.ttl_seconds or entry.created_on != today
+        ]
+        for entry_id in expired:
+            self._remove(entry_id)
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        self._free_rows.append(entry.row)
+        user_rows = self._user_rows.get(entry.user_id)
+        if user_rows is not None:
+            user_rows.pop(entry_id, None)
+            if not user_rows:
+                del self._user_rows[entry.user_id]
+
+    def _nearest(self, user_id: str, vector: np.ndarray) -> Tuple[Optional[int], float]:
+        user_rows = self._user_rows.get(user_id)
+        if not user_rows:
+            return None, 0.0
+        ids = list(user_rows.keys())
+        rows = np.fromiter(user_rows.values(), dtype=np.intp, count=len(user_rows))
+        scores = self._matrix[rows] @ vector
+        best = int(np.argmax(scores))
+        return ids[best], float(scores[best])
+
+    @staticmethod
+    def _is_cacheable(request: NaturalLanguageRequest) -> bool:
+        # Requests with extra context may resolve differently, so only cache plain text
+        return not request.context
+
+    async def lookup(self, request: NaturalLanguageRequest) -> Optional[List[EventSuggestion]]:
+        """
+        Return cached suggestions adapted to the request's times and names, if a close match exists
+        """
+        if not self._is_cacheable(request) or not self._model_available():
+            return None
+
+        try:
+            slots = extract_slots(request.text)
+            vector = await self._embed(slots.template)
+        except Exception as e:
+            logger.error(f"Semantic cache lookup failed: {e}")
+            return None
+
+        self._evict_expired()
+        entry_id, score = self._nearest(request.user_id, vector)
+        if entry_id is None or score < self.threshold:
+            self.misses += 1
+            return None
+
+        entry = self._entries[entry_id]
+        adapted = self._substitute(entry, slots)
+        if adapted is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(entry_id)
+        self.hits += 1
+        logger.debug(f"Semantic cache hit (score={score:.3f}) for '{request.text}'")
+        return adapted
+
+    async def store(self, request: NaturalLanguageRequest, suggestions: List[EventSuggestion]):
+        """
+        Remember parsed suggestions for a request
+        """
+        if not suggestions or not self._is_cacheable(request) or not self._model_available():
+            return
+
+        try:
+            slots = extract_slots(request.text)
+            vector = await self._embed(slots.template)
+        except Exception as e:
+            logger.error(f"Semantic cache store failed: {e}")
+            return
+
+        while self._entries and not self._free_rows:
+            self._remove(next(iter(self._entries)))
+        if self._matrix is None:
+            self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+        entry_id = self._next_id
+        self._next_id += 1
+        row = self._free_rows.pop()
+        self._matrix[row] = vector
+        self._entries[entry_id] = _CacheEntry(
+            user_id=request.user_id,
+            slots=slots,
+            suggestions=suggestions,
+            created_at=time.monotonic(),
+            created_on=date.today(),
+            row=row
+        )
+        self._user_rows.setdefault(request.user_id, {})[entry_id] = row
+
+    @staticmethod
+    def _substitute(entry: _CacheEntry, slots: ExtractedSlots) -> Optional[List[EventSuggestion]]:
+        cached = entry.slots
+        # Slots must line up one-to-one, otherwise the cached answer cannot be re-targeted
+        if len(cached.times) != len(slots.times) or len(cached.entities) != len(slots.entities):
+            return None
+        # Dates and durations are not re-targeted, so they have to match exactly
+        if cached.dates != slots.dates or cached.durations != slots.durations:
+            return None
+
+        replacements = dict(zip(cached.entities, slots.entities))
+        time_map = dict(zip(cached.times, slots.times))
+
+        def _replace_entities(value: Optional[str]) -> Optional[str]:
+            if not value:
+                return value
+            for old, new in replacements.items():
+                value = re.sub(rf"\b{re.escape(old)}\b", new, value)
+            return value
+
+        def _shift(start: datetime, end: datetime) -> Optional[Tuple[datetime, datetime]]:
+            if not time_map:
+                return start, end
+            new_time = time_map.get((start.hour, start.minute))
+            if new_time is None:
+                # The model read the time differently from the slot (e.g. 03:00 for "at 3",
+                # or UTC), so the cached start cannot be re-targeted
+                return None
+            duration = end - start
+            new_start = start.replace(hour=new_time[0], minute=new_time[1])
+            return new_start, new_start + duration
+
+        adapted = []
+        for suggestion in entry.suggestions:
+            shifted = _shift(suggestion.suggested_start_time, suggestion.suggested_end_time)
+            if shifted is None:
+                return None
+            start, end = shifted
+            adapted.append(suggestion.model_copy(update={
+                "title": _replace_entities(suggestion.title),
+                "description": _replace_entities(suggestion.description),
+                "location": _replace_entities(suggestion.location),
+                "suggested_start_time": start,
+                "suggested_end_time": end,
+            }))
+        return adapted
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0
+        }
@@ -1,6 +1,6 @@
 from functools import lru_cache
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Dict
 import os
 
 class Settings(BaseSettings):
@@ -9,11 +9,45 @@ class Settings(BaseSettings):
     openai_model: str = "gpt-3.5-turbo"
     openai_max_tokens: int = 1000
     openai_temperature: float = 0.7
+    openai_base_url: str = "https://api.openai.com/v1"
+    
+    # CPU threads for in-process torch models (local LLM, semantic cache); set once at startup
+    torch_num_threads: int = 4
+    
+    # Local LLM Configuration (in-process CPU backend, routed by input length)
+    llm_local_enabled: bool = False
+    llm_local_model: str = "Qwen/Qwen2.5-0.5B-Instruct"
+    llm_local_quantize: bool = True
+    llm_local_tasks: List[str] = ["parse_event", "summary"]
+    llm_local_max_input_chars: int = 400
+    llm_local_min_confidence: float = 0.6
+    llm_local_batch_size: int = 4
+    llm_local_batch_wait_ms: int = 20
+    llm_local_load_retry_seconds: int = 300
+    
+    # AI Admission Control (per-user token buckets + weighted fair queueing)
+    ai_max_concurrency: int = 8
+    ai_max_queue_length: int = 64
+    ai_max_batch_queue_length: int = 32
+    ai_queue_timeout_seconds: float = 10.0
+    ai_user_rate_per_second: float = 1.0
+    ai_user_burst: float = 5.0
+    ai_user_weights: Dict[str, float] = {}
+    ai_max_tracked_users: int = 10000
+    
+    # Semantic Cache Configuration (parse-event)
+    semantic_cache_enabled: bool = False
+    semantic_cache_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    semantic_cache_threshold: float = 0.92
+    semantic_cache_max_entries: int = 5000
+    semantic_cache_ttl_seconds: int = 3600
+    semantic_cache_load_retry_seconds: int = 300
     
     # API Configuration
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     debug: bool = False
+    admin_token: str = ""
     
     # CORS Configuration
     allowed_origins: List[str] = ["http://localhost:3000", "http://localhost:8080"]
@@ -21,10 +55,34 @@ class Settings(BaseSettings):
     # Backend API Configuration
     backend_api_url: str = "http://localhost:8080"
     backend_graphql_endpoint: str = "http://localhost:8080/graphql"
+    backend_max_connections: int = 50
+    backend_max_keepalive_connections: int = 20
+    
+    # Bulk conflict scanning
+    bulk_conflict_max_users: int = 200
+    bulk_conflict_max_concurrency: int = 10
     
     # Redis Configuration (for caching)
     redis_url: str = "redis://localhost:6379"
     
+    # Schedule Summary Configuration (materialized per-day aggregates)
+    # Nothing invalidates cells when events change, so this bounds how stale they get
+    schedule_summary_ttl_seconds: int = 15 * 60
+    schedule_summary_redis_timeout_seconds: float = 0.5
+    
+    # Health Check Configuration
+    health_check_interval_seconds: float = 15.0
+    health_check_timeout_seconds: float = 3.0
+    health_required_dependencies: List[str] = ["backend_api"]
+    
+    # Request Profiling Configuration
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 0.0
+    profiling_debug_header: str = "X-Debug-Profile"
+    profiling_cpu_sampling: bool = False
+    profiling_cpu_sample_interval_ms: float = 5.0
+    profiling_max_profiles: int = 200
+    
     # Environment
     environment: str = "development"
     
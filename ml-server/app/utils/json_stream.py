@@ -0,0 +1,194 @@
+import json
+from typing import List, Dict, Any, Optional, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class IncrementalObjectParser:
+    """
+    Incremental JSON scanner that emits each object as soon as it closes.
+
+    Objects are emitted when they are elements of a top-level array
+    (``[{...}, {...}]``) or of an array held directly by a top-level object
+    (``{"events": [{...}]}``), which covers both plain JSON answers and
+    function-call arguments. Anything before the first bracket (prose, code
+    fences) is ignored.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._candidate_start: Optional[int] = None
+        self._length = 0
+        self.emitted = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self._buffer)
+
+    @property
+    def unclosed(self) -> bool:
+        """
+        Whether a JSON value was opened but the input ended before it closed
+        """
+        return self._started and bool(self._stack)
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        completed = []
+        offset = self._length
+        self._buffer.append(chunk)
+        self._length += len(chunk)
+
+        for i, char in enumerate(chunk):
+            position = offset + i
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if not self._started:
+                if char in "[{":
+                    self._started = True
+                else:
+                    continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "[{":
+                if char == "{" and self._emits_at_depth(len(self._stack)):
+                    self._candidate_start = position
+                self._stack.append(char)
+            elif char in "]}":
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                if char == "}" and self._candidate_start is not None and self._emits_at_depth(len(self._stack)):
+                    obj = self._decode(self._candidate_start, position + 1)
+                    self._candidate_start = None
+                    if obj is not None:
+                        completed.append(obj)
+
+        self.emitted += len(completed)
+        return completed
+
+    def _emits_at_depth(self, depth: int) -> bool:
+        # The object about to open (or just closed) sits at ``depth`` inside the stack
+        if depth == 0 or self._stack[depth - 1] != "[":
+            return False
+        return depth == 1 or (depth == 2 and self._stack[0] == "{")
+
+    def _decode(self, start: int, end: int) -> Optional[Dict[str, Any]]:
+        raw = self.text[start:end]
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping malformed streamed object: {e}")
+            return None
+        return value if isinstance(value, dict) else None
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """
+        Recover objects that the streaming pass could not emit, e.g. a single
+        bare object or a wrapper that was cut off before its array opened
+        """
+        if self.emitted:
+            return []
+        value = loads_with_repair(self.text)
+        if isinstance(value, list):
+            return [item for item in value if isinstance(item, dict)]
+        if isinstance(value, dict):
+            for item in value.values():
+                if isinstance(item, list):
+                    return [obj for obj in item if isinstance(obj, dict)]
+            return [value]
+        return []
+
+
+def repair_truncated_json(text: str) -> str:
+    """
+    Cheaply repair JSON that was cut off mid-output: strip leading prose and code
+    fences, drop the trailing incomplete element and close any open containers
+    """
+    start = min((i for i in (text.find("["), text.find("{")) if i != -1), default=-1)
+    if start == -1:
+        return text
+    text = text[start:]
+
+    stack: List[str] = []
+    in_string = False
+    escape = False
+    safe_end = 0
+    safe_stack: List[str] = []
+
+    for i, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "[{":
+            stack.append(char)
+            if len(stack) == 1:
+                safe_end, safe_stack = i + 1, list(stack)
+        elif char in "]}":
+            if stack:
+                stack.pop()
+            safe_end, safe_stack = i + 1, list(stack)
+            if not stack:
+                return text[:safe_end]
+        elif char == "," and stack:
+            # Everything before a comma is a complete element or key-value pair
+            safe_end, safe_stack = i, list(stack)
+
+    return text[:safe_end].rstrip().rstrip(",") + "".join(_CLOSERS[c] for c in reversed(safe_stack))
+
+
+def loads_with_repair(text: str) -> Optional[Union[Dict[str, Any], List[Any]]]:
+    """
+    Parse JSON, falling back to repair_truncated_json; returns None if both fail
+    """
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(repair_truncated_json(text))
+    except json.JSONDecodeError:
+        return None
+
+
+def inline_schema_refs(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Inline ``#/$defs/...`` references of a Pydantic JSON schema so it can be
+    used as function-calling parameters
+    """
+    definitions = schema.get("$defs", {})
+
+    def resolve(node: Any) -> Any:
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if ref and ref.startswith("#/$defs/"):
+                merged = {k: v for k, v in node.items() if k != "$ref"}
+                merged.update(resolve(definitions[ref.split("/")[-1]]))
+                return merged
+            return {k: resolve(v) for k, v in node.items() if k != "$defs"}
+        if isinstance(node, list):
+            return [resolve(item) for item in node]
+        return node
+
+    return resolve(schema)
@@ -0,0 +1,276 @@
+import hmac
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Deque
+import logging
+from app.utils.config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    name: str
+    start_ms: float
+    duration_ms: float = 0.0
+    depth: int = 0
+
+
+@dataclass
+class RequestProfile:
+    id: str
+    method: str
+    path: str
+    started_at: datetime
+    spans: List[Span] = field(default_factory=list)
+    total_ms: float = 0.0
+    status_code: Optional[int] = None
+    cpu_samples: Counter = field(default_factory=Counter)
+    _origin: float = field(default_factory=time.perf_counter, repr=False)
+    _depth: int = field(default=0, repr=False)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._origin) * 1000
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at.isoformat(),
+            "status_code": self.status_code,
+            "total_ms": round(self.total_ms, 2),
+            "cpu_profiled": bool(self.cpu_samples)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.summary(),
+            "spans": [
+                {
+                    "name": s.name,
+                    "start_ms": round(s.start_ms, 2),
+                    "duration_ms": round(s.duration_ms, 2),
+                    "depth": s.depth
+                }
+                for s in self.spans
+            ],
+            "cpu_sample_count": sum(self.cpu_samples.values())
+        }
+
+    def folded_stacks(self) -> str:
+        """
+        CPU samples in collapsed-stack format (flamegraph.pl, speedscope, inferno)
+        """
+        return "\n".join(f"{stack} {count}" for stack, count in self.cpu_samples.most_common())
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+class _SpanContext:
+    __slots__ = ("profile", "span")
+
+    def __init__(self, profile: RequestProfile, name: str):
+        self.profile = profile
+        self.span = Span(name=name, start_ms=0.0, depth=profile._depth)
+
+    def __enter__(self):
+        self.span.start_ms = self.profile.elapsed_ms()
+        self.profile._depth += 1
+        return self.span
+
+    def __exit__(self, *exc):
+        self.profile._depth -= 1
+        self.span.duration_ms = self.profile.elapsed_ms() - self.span.start_ms
+        self.profile.spans.append(self.span)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        return self.__exit__(*exc)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str):
+    """
+    Time a stage of the current request; a no-op unless the request is being profiled.
+    Usable as ``with span("decode"):`` or ``async with span("fetch"):``.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return _NOOP_SPAN
+    return _SpanContext(profile, name)
+
+
+class StackSampler:
+    """
+    Samples the event loop thread's Python stack on an interval from a side thread.
+
+    The loop is shared, so samples taken while other requests run on it are
+    attributed to this profile as well; treat the result as a view of what the
+    loop was doing during the request.
+    """
+
+    def __init__(self, profile: RequestProfile, thread_id: int, interval: float):
+        self.profile = profile
+        self.thread_id = thread_id
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{profile.id}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        # No join: the daemon thread exits within one interval, and joining would block the loop
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.profile.cpu_samples[";".join(reversed(stack))] += 1
+
+
+class ProfileStore:
+    """
+    Bounded in-memory store of the most recent request profiles
+    """
+
+    def __init__(self, max_profiles: int):
+        self._profiles: Deque[RequestProfile] = deque(maxlen=max_profiles)
+
+    def add(self, profile: RequestProfile):
+        self._profiles.append(profile)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [profile.summary() for profile in reversed(self._profiles)]
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def clear(self):
+        self._profiles.clear()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles a sampled fraction of requests, plus any request
+    carrying the debug header (value ``cpu`` also turns on stack sampling). The
+    header is only honoured together with a valid ``X-Admin-Token`` (or in debug
+    mode when no token is configured), and at most one stack sampler runs at a
+    time. Unsampled requests pass straight through.
+    """
+
+    def __init__(self, app, settings: Settings, store: ProfileStore):
+        self.app = app
+        self.sample_rate = settings.profiling_sample_rate
+        self.header = settings.profiling_debug_header.lower().encode("latin-1")
+        self.cpu_by_default = settings.profiling_cpu_sampling
+        self.cpu_interval = settings.profiling_cpu_sample_interval_ms / 1000
+        self.admin_token = settings.admin_token
+        self.debug = settings.debug
+        self.store = store
+        self._sampler_active = False
+
+    def _debug_header(self, scope) -> Optional[str]:
+        value = None
+        admin_token = None
+        for name, raw in scope.get("headers", []):
+            if name == self.header:
+                value = raw.decode("latin-1").strip().lower()
+            elif name == b"x-admin-token":
+                admin_token = raw.decode("latin-1")
+        if value is None:
+            return None
+        if self.admin_token:
+            authorized = admin_token is not None and hmac.compare_digest(admin_token, self.admin_token)
+        else:
+            authorized = self.debug
+        return value if authorized else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header_value = self._debug_header(scope)
+        if header_value is None and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(
+            id=uuid.uuid4().hex[:12],
+            method=scope.get("method", ""),
+            path=scope.get("path", ""),
+            started_at=datetime.now()
+        )
+        sampler = None
+        if (self.cpu_by_default or header_value == "cpu") and not self._sampler_active:
+            self._sampler_active = True
+            sampler = StackSampler(profile, threading.get_ident(), self.cpu_interval)
+            sampler.start()
+
+        respond_span = None
+
+        async def send_with_profile(message):
+            nonlocal respond_span
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", profile.id.encode("latin-1"))]
+                respond_span = _SpanContext(profile, "respond")
+                respond_span.__enter__()
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body") and respond_span:
+                respond_span.__exit__(None, None, None)
+                respond_span = None
+
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            _current_profile.reset(token)
+            if sampler is not None:
+                sampler.stop()
+                self._sampler_active = False
+            profile.total_ms = profile.elapsed_ms()
+            profile.spans.sort(key=lambda s: s.start_ms)
+            self.store.add(profile)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark parse-event latency and throughput for the LLM backends.
+
+Usage (from ml-server/):
+    python scripts/benchmark_llm_backends.py --backend local --requests 32 --concurrency 8
+    python scripts/benchmark_llm_backends.py --backend openai --requests 16 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.llm_backends import LocalTransformersBackend, OpenAIBackend  # noqa: E402
+from app.utils.config import get_settings  # noqa: E402
+
+SAMPLE_INPUTS = [
+    "coffee with Jin at 3pm tomorrow",
+    "Team standup every weekday at 9:30",
+    "dentist appointment friday 11am",
+    "lunch w/ Sarah at noon at the Italian place",
+    "Gym session tonight at 7 for an hour",
+    "Call mom on Sunday afternoon",
+]
+
+SYSTEM_PROMPT = (
+    "Extract calendar events from the user input. Return only a JSON array of objects with "
+    "title, suggested_start_time, suggested_end_time, category, priority and confidence_score."
+)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+async def run(backend, total_requests: int, concurrency: int, max_tokens: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": SAMPLE_INPUTS[i % len(SAMPLE_INPUTS)]},
+        ]
+        async with semaphore:
+            started = time.perf_counter()
+            await backend.complete(messages, max_tokens, 0.0)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    # Warm up (model load, first-call allocation) outside the measurement
+    await one(0)
+    latencies.clear()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total_requests)))
+    elapsed = time.perf_counter() - started
+    await backend.close()
+
+    print(f"backend:      {backend.name}")
+    print(f"requests:     {total_requests} (concurrency {concurrency})")
+    print(f"throughput:   {total_requests / elapsed:.2f} req/s")
+    print(f"latency p50:  {statistics.median(latencies):.0f} ms")
+    print(f"latency p95:  {percentile(latencies, 95):.0f} ms")
+    print(f"latency max:  {max(latencies):.0f} ms")
+
+
+def main():
+    """
+    Parse arguments and run the benchmark
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["local", "openai"], default="local")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-tokens", type=int, default=256)
+    args = parser.parse_args()
+
+    settings = get_settings()
+    if args.backend == "local":
+        import torch
+
+        # Same process-wide thread setting the server applies at startup
+        torch.set_num_threads(settings.torch_num_threads)
+        backend = LocalTransformersBackend(settings)
+    else:
+        backend = OpenAIBackend(settings)
+    asyncio.run(run(backend, args.requests, args.concurrency, args.max_tokens))
+
+
+if __name__ == "__main__":
+    main()
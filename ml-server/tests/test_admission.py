@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionRejected, Priority
+
+
+def _controller(queue_length=4, batch_queue_length=4, queue_timeout=1.0):
+    controller = AdmissionController()
+    controller.max_concurrency = 1
+    controller.max_queue_length = {Priority.INTERACTIVE: queue_length, Priority.BATCH: batch_queue_length}
+    controller.queue_timeout = queue_timeout
+    return controller
+
+
+async def _grant_order(controller, requests):
+    """
+    Queue (name, user_id, priority) requests behind a held slot, then record the
+    order in which they are granted
+    """
+    order = []
+
+    async def wait(name, user_id, priority):
+        ticket = await controller.acquire(user_id, priority)
+        order.append(name)
+        ticket.release()
+
+    held = await controller.acquire(None)
+    tasks = [asyncio.create_task(wait(*request)) for request in requests]
+    await asyncio.sleep(0)
+    held.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_interactive_lane_is_served_before_batch():
+    order = asyncio.run(_grant_order(_controller(), [
+        ("batch-1", None, Priority.BATCH),
+        ("batch-2", None, Priority.BATCH),
+        ("interactive", "u1", Priority.INTERACTIVE),
+    ]))
+
+    assert order == ["interactive", "batch-1", "batch-2"]
+
+
+def test_users_are_served_fairly_within_a_lane():
+    order = asyncio.run(_grant_order(_controller(), [
+        ("heavy-1", "heavy", Priority.INTERACTIVE),
+        ("heavy-2", "heavy", Priority.INTERACTIVE),
+        ("heavy-3", "heavy", Priority.INTERACTIVE),
+        ("light-1", "light", Priority.INTERACTIVE),
+    ]))
+
+    assert order == ["heavy-1", "light-1", "heavy-2", "heavy-3"]
+
+
+def test_full_batch_queue_does_not_reject_interactive_requests():
+    async def scenario():
+        controller = _controller(batch_queue_length=2)
+        held = await controller.acquire(None, Priority.BATCH)
+        batch = [asyncio.create_task(controller.acquire(None, Priority.BATCH)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire(None, Priority.BATCH)
+        interactive = asyncio.create_task(controller.acquire("u1", Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        assert controller.stats()["queued_by_lane"] == {"interactive": 1, "batch": 2}
+
+        held.release()
+        (await interactive).release()
+        for task in batch:
+            (await task).release()
+        assert controller.stats()["active"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_rejects_and_frees_the_queue_slot():
+    async def scenario():
+        controller = _controller(queue_timeout=0.01)
+        held = await controller.acquire(None)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("u1")
+        assert rejected.value.retry_after >= 1
+        assert controller.stats()["queued"] == 0
+
+        held.release()
+        assert controller.stats()["active"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiters_leave_the_queue():
+    async def scenario():
+        controller = _controller()
+        held = await controller.acquire(None)
+        cancelled = asyncio.create_task(controller.acquire("u1"))
+        successor = asyncio.create_task(controller.acquire("u2"))
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert controller.stats()["queued"] == 1
+
+        held.release()
+        (await successor).release()
+        assert controller.stats()["active"] == 0
+        assert controller.stats()["queued"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,54 @@
+import asyncio
+
+from app.services.calendar_service import CalendarService
+
+
+def _event(event_id, start, end, title=None):
+    return {"id": event_id, "title": title or event_id, "startTime": start, "endTime": end}
+
+
+def test_shared_event_overlapping_an_attendees_event_is_a_double_booking():
+    service = CalendarService()
+    review = _event("review", "2026-10-20T10:00:00Z", "2026-10-20T11:00:00Z")
+    events_by_user = {
+        # Naive and aware timestamps on one calendar must still compare
+        "alice": [review, _event("dentist", "2026-10-20T10:30:00", "2026-10-20T11:30:00")],
+        "bob": [review, _event("lunch", "2026-10-20T12:00:00+00:00", "2026-10-20T13:00:00+00:00")],
+    }
+
+    double_bookings = service.detect_shared_double_bookings(events_by_user)
+
+    assert len(double_bookings) == 1
+    assert double_bookings[0]["user_id"] == "alice"
+    assert double_bookings[0]["attendees"] == ["alice", "bob"]
+    assert [e["id"] for e in double_bookings[0]["overlapping_events"]] == ["dentist"]
+
+
+def test_bulk_scan_streams_each_user_then_the_shared_line():
+    service = CalendarService()
+    calendars = {
+        "alice": [
+            _event("a1", "2026-10-20T09:00:00Z", "2026-10-20T10:00:00Z"),
+            _event("a2", "2026-10-20T09:30:00", "2026-10-20T10:30:00"),
+        ],
+        "bob": [],
+    }
+
+    async def fetch_user_events(user_id, start_date=None, end_date=None):
+        if user_id not in calendars:
+            raise RuntimeError("backend unavailable")
+        return calendars[user_id]
+
+    service.fetch_user_events = fetch_user_events
+
+    async def scan():
+        return [line async for line in service.scan_conflicts_bulk(["alice", "bob", "carol"])]
+
+    lines = asyncio.run(scan())
+    by_user = {line["user_id"]: line for line in lines if line["type"] == "user"}
+
+    assert by_user["alice"]["conflicts_found"] == 1
+    assert by_user["bob"]["conflicts_found"] == 0
+    assert by_user["carol"]["error"] == "Failed to fetch events"
+    assert lines[-1]["type"] == "shared"
+    assert lines[-1]["users_scanned"] == 2
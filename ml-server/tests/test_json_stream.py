@@ -0,0 +1,37 @@
+from app.utils.json_stream import IncrementalObjectParser, loads_with_repair, repair_truncated_json
+
+
+def test_repair_keeps_complete_scalars_before_the_cut():
+    assert loads_with_repair('Sure! {"optimizations": ["a", "b') == {"optimizations": ["a"]}
+    assert loads_with_repair('{"conflicts": [], "score": 7, "notes": "unfini') == {"conflicts": [], "score": 7}
+
+
+def test_repair_drops_incomplete_nested_pair():
+    repaired = repair_truncated_json('```json\n{"a": 1, "b": {"c": 2, "d": [1, 2')
+
+    assert loads_with_repair(repaired) == {"a": 1, "b": {"c": 2, "d": [1]}}
+
+
+def test_repair_ignores_commas_inside_strings():
+    assert loads_with_repair('{"items": ["x, y", "z') == {"items": ["x, y"]}
+
+
+def test_complete_json_passes_through():
+    assert repair_truncated_json('Here you go: {"a": [1, 2]} thanks') == '{"a": [1, 2]}'
+
+
+def test_incremental_parser_emits_objects_as_they_close():
+    parser = IncrementalObjectParser()
+
+    assert parser.feed('{"events": [{"title": "a"}, {"tit') == [{"title": "a"}]
+    assert parser.feed('le": "b"}]}') == [{"title": "b"}]
+
+
+def test_incremental_parser_reports_unclosed_output():
+    parser = IncrementalObjectParser()
+    parser.feed('{"events": [{"title": "a"}, {"title": "b", "sugg')
+
+    assert parser.unclosed
+
+    parser.feed('ested": 1}]}')
+    assert not parser.unclosed
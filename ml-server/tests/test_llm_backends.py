@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.llm_backends import LLMRouter, LocalTransformersBackend, OpenAIBackend
+from app.utils.config import get_settings
+
+MESSAGES = [{"role": "user", "content": "coffee with Jin at 3"}]
+
+
+def _local_backend(batch_size=4):
+    backend = LocalTransformersBackend(get_settings())
+    backend.batch_size = batch_size
+    return backend
+
+
+def test_router_measures_the_raw_input_not_the_prompt():
+    settings = get_settings()
+    router = LLMRouter(settings, remote=OpenAIBackend(settings), local=_local_backend())
+
+    assert router.select("parse_event", "x" * settings.llm_local_max_input_chars) is router.local
+    assert router.select("parse_event", "x" * (settings.llm_local_max_input_chars + 1)) is router.remote
+    assert router.select("optimize_schedule", "short") is router.remote
+
+
+def test_failed_local_load_backs_off_and_routes_to_remote():
+    settings = get_settings()
+    local = _local_backend()
+    router = LLMRouter(settings, remote=OpenAIBackend(settings), local=local)
+    attempts = []
+
+    def failing_load():
+        attempts.append(1)
+        raise OSError("offline")
+
+    local._load = failing_load
+
+    async def scenario():
+        with pytest.raises(OSError):
+            await local.complete(MESSAGES, 16, 0.0)
+        with pytest.raises(RuntimeError):
+            await local.complete(MESSAGES, 16, 0.0)
+
+    asyncio.run(scenario())
+
+    assert len(attempts) == 1
+    assert router.select("parse_event", "coffee") is router.remote
+
+
+def test_close_fails_in_flight_and_queued_generations():
+    local = _local_backend(batch_size=1)
+    local._model = object()
+
+    def slow_generate(prompts, max_tokens):
+        time.sleep(0.2)
+        return ["[]" for _ in prompts]
+
+    local._generate_batch = slow_generate
+
+    async def scenario():
+        in_flight = asyncio.create_task(local.complete(MESSAGES, 16, 0.0))
+        queued = asyncio.create_task(local.complete(MESSAGES, 16, 0.0))
+        await asyncio.sleep(0.05)
+
+        await local.close()
+
+        for task in (in_flight, queued):
+            with pytest.raises(RuntimeError, match="closed"):
+                await asyncio.wait_for(task, timeout=1.0)
+
+    asyncio.run(scenario())
@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+from app.models.schemas import NaturalLanguageRequest
+from app.services.llm_backends import LLMBackend, OutputTruncated
+from app.services.openai_service import OpenAIService
+
+EVENT = {
+    "title": "Standup",
+    "suggested_start_time": "2026-10-20T09:00:00",
+    "suggested_end_time": "2026-10-20T09:15:00",
+    "category": "WORK",
+    "priority": "MEDIUM",
+    "confidence_score": 0.9,
+}
+
+
+class _ScriptedBackend(LLMBackend):
+    name = "scripted"
+    supports_tools = True
+
+    def __init__(self, chunks, hit_max_tokens=False):
+        self.chunks = chunks
+        self.hit_max_tokens = hit_max_tokens
+
+    async def complete(self, messages, max_tokens, temperature):
+        return "".join(self.chunks)
+
+    async def stream(self, messages, max_tokens, temperature, tool=None):
+        for chunk in self.chunks:
+            yield chunk
+        if self.hit_max_tokens:
+            raise OutputTruncated("scripted output was cut off")
+
+
+class _RecordingCache:
+    def __init__(self):
+        self.stored = []
+
+    async def lookup(self, request):
+        return None
+
+    async def store(self, request, suggestions):
+        self.stored.append(suggestions)
+
+
+def _service(backend):
+    service = OpenAIService()
+    service.llm_router.remote = backend
+    service.llm_router.local = None
+    service.semantic_cache = _RecordingCache()
+    return service
+
+
+def _parse(service):
+    request = NaturalLanguageRequest(text="standup at 9", user_id="u1")
+    return asyncio.run(service.parse_natural_language_event(request))
+
+
+def test_max_tokens_cut_marks_result_partial_and_skips_the_cache():
+    chunks = ['{"events": [', json.dumps(EVENT), ', {"title": "Lunch", "sugg']
+    service = _service(_ScriptedBackend(chunks, hit_max_tokens=True))
+
+    suggestions, partial = _parse(service)
+
+    assert [s.title for s in suggestions] == ["Standup"]
+    assert partial
+    assert service.semantic_cache.stored == []
+
+
+def test_unclosed_output_is_partial_without_a_stop_reason():
+    service = _service(_ScriptedBackend(['[', json.dumps(EVENT), ', {"title": "Lun']))
+
+    suggestions, partial = _parse(service)
+
+    assert len(suggestions) == 1
+    assert partial
+
+
+def test_complete_output_is_cached():
+    service = _service(_ScriptedBackend([json.dumps({"events": [EVENT]})]))
+
+    suggestions, partial = _parse(service)
+
+    assert len(suggestions) == 1
+    assert not partial
+    assert len(service.semantic_cache.stored) == 1
@@ -0,0 +1,71 @@
+from datetime import date, timedelta, timezone
+
+from app.services.schedule_summary import (
+    compose_summaries,
+    compute_day_summary,
+    group_events_by_day,
+)
+
+DAY = date(2026, 10, 20)
+
+
+def _event(event_id, start, end, category="WORK"):
+    return {
+        "id": event_id,
+        "title": event_id,
+        "startTime": f"2026-10-20T{start}",
+        "endTime": f"2026-10-20T{end}",
+        "category": category,
+    }
+
+
+def test_duplicate_events_are_counted_as_conflicts():
+    events = [
+        _event("a", "10:00:00Z", "11:00:00Z"),
+        _event("b", "10:00:00Z", "11:00:00Z"),
+    ]
+
+    summary = compute_day_summary(DAY, events)
+
+    assert summary["event_count"] == 2
+    assert summary["conflict_count"] == 1
+    assert summary["busy_minutes_by_category"] == {"WORK": 120.0}
+
+
+def test_overlapping_events_with_mixed_timezone_styles():
+    events = [
+        _event("a", "09:30:00Z", "10:30:00Z"),
+        _event("b", "10:00:00", "11:00:00", category="SOCIAL"),
+        _event("c", "13:00:00+00:00", "14:00:00+00:00"),
+    ]
+
+    summary = compute_day_summary(DAY, events)
+
+    assert summary["conflict_count"] == 1
+    assert summary["back_to_back_count"] == 1
+    assert summary["gap_histogram"]["gte_2h"] == 1
+    assert summary["longest_focus_block_minutes"] == 240
+
+
+def test_compose_sums_cells_and_keeps_longest_focus_block():
+    busy = compute_day_summary(DAY, [_event("a", "09:00:00Z", "17:00:00Z")])
+    free = compute_day_summary(DAY, [])
+
+    total = compose_summaries([busy, free])
+
+    assert total["event_count"] == 1
+    assert total["busy_minutes_by_category"] == {"WORK": 480.0}
+    assert total["longest_focus_block_minutes"] == 540
+
+
+def test_events_are_grouped_and_summarised_in_the_request_timezone():
+    seoul = timezone(timedelta(hours=9))
+    # 08:30 on 2026-10-20 in +09:00, still 2026-10-19 in UTC
+    event = {"id": "a", "startTime": "2026-10-19T23:30:00Z", "endTime": "2026-10-20T00:30:00Z", "category": "WORK"}
+
+    grouped = group_events_by_day([event], seoul)
+    summary = compute_day_summary(DAY, grouped[DAY], seoul)
+
+    assert list(grouped) == [DAY]
+    assert summary["event_count"] == 1
+    assert summary["longest_focus_block_minutes"] == 510
@@ -0,0 +1,108 @@
+import asyncio
+import time
+from datetime import date, datetime
+
+import numpy as np
+
+from app.models.schemas import EventSuggestion, NaturalLanguageRequest
+from app.services.semantic_cache import SemanticCache, _CacheEntry, extract_slots
+
+
+def test_paraphrases_share_a_template():
+    first = extract_slots("coffee w/ Jin at 3")
+    second = extract_slots("coffee with Jin 3pm")
+
+    assert first.template == second.template == "coffee with <name> <time>"
+    assert first.times == second.times == [(15, 0)]
+    assert first.entities == ["Jin"]
+
+
+def test_dates_and_durations_are_extracted_as_slots():
+    today = extract_slots("meeting with Jin today at 3 for 1 hour")
+    tomorrow = extract_slots("meeting with Jin tomorrow at 3 for 2 hours")
+
+    assert today.template == tomorrow.template == "meeting with <name> <date> <time> for <duration>"
+    assert today.dates == ["today"]
+    assert tomorrow.dates == ["tomorrow"]
+    assert today.durations == [60.0]
+    assert tomorrow.durations == [120.0]
+
+
+def test_calendar_dates_and_bare_numbers():
+    slots = extract_slots("Lunch on May 5th with 2 people")
+
+    assert slots.dates == ["may 5th"]
+    assert slots.times == []
+    assert slots.template == "lunch on <date> with 2 people"
+
+
+def test_time_does_not_swallow_following_space():
+    slots = extract_slots("call at 10:30 for 30 minutes")
+
+    assert slots.template == "call <time> for <duration>"
+    assert slots.times == [(10, 30)]
+
+
+def _suggestion(start, end):
+    return EventSuggestion(
+        title="Coffee with Jin",
+        suggested_start_time=start,
+        suggested_end_time=end,
+        category="SOCIAL",
+        priority="LOW",
+        confidence_score=0.9,
+    )
+
+
+def _entry(text, start, end):
+    return _CacheEntry(
+        user_id="u1",
+        slots=extract_slots(text),
+        suggestions=[_suggestion(start, end)],
+        created_at=time.monotonic(),
+        created_on=date.today(),
+    )
+
+
+def test_substitute_retargets_names_and_times():
+    entry = _entry("coffee with Jin at 3", datetime(2026, 10, 20, 15, 0), datetime(2026, 10, 20, 16, 0))
+
+    adapted = SemanticCache._substitute(entry, extract_slots("coffee with Bob at 5"))
+
+    assert adapted[0].title == "Coffee with Bob"
+    assert adapted[0].suggested_start_time == datetime(2026, 10, 20, 17, 0)
+    assert adapted[0].suggested_end_time == datetime(2026, 10, 20, 18, 0)
+
+
+def test_substitute_misses_when_cached_time_does_not_match_its_slot():
+    # The model read "at 3" as 03:00, so the slot (15:00) cannot be mapped onto it
+    entry = _entry("coffee with Jin at 3", datetime(2026, 10, 20, 3, 0), datetime(2026, 10, 20, 4, 0))
+
+    assert SemanticCache._substitute(entry, extract_slots("coffee with Bob at 5")) is None
+
+
+def test_entries_are_scoped_per_user_and_rows_are_reused():
+    async def scenario():
+        cache = SemanticCache()
+        cache.max_entries = 2
+        cache._free_rows = [1, 0]
+
+        async def embed(text):
+            return np.ones(4, dtype=np.float32) / 2
+
+        cache._embed = embed
+        suggestions = [_suggestion(datetime(2026, 10, 20, 15, 0), datetime(2026, 10, 20, 16, 0))]
+        await cache.store(NaturalLanguageRequest(text="coffee with Jin at 3", user_id="u1"), suggestions)
+
+        other_user = await cache.lookup(NaturalLanguageRequest(text="coffee with Bob at 5", user_id="u2"))
+        same_user = await cache.lookup(NaturalLanguageRequest(text="coffee with Bob at 5", user_id="u1"))
+        assert other_user is None
+        assert same_user[0].title == "Coffee with Bob"
+
+        for user_id in ("u2", "u3"):
+            await cache.store(NaturalLanguageRequest(text="coffee with Jin at 3", user_id=user_id), suggestions)
+        assert cache.stats()["entries"] == 2
+        assert sorted(cache._user_rows) == ["u2", "u3"]
+        assert cache._matrix.shape == (2, 4)
+
+    asyncio.run(scenario())